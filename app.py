@@ -1,6 +1,7 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import numpy as np
-import json
+from typing import Dict, Tuple
 from graph_model import PlanarGraph
 from geometry import GeometryEngine
 from gui_components import GraphRenderer
@@ -8,93 +9,190 @@ from commands import CommandProcessor
 from settings import COLORS, SETTINGS
 import utils
 
+@st.cache_resource
+def _geometry() -> GeometryEngine:
+    """Geometry engine shared by all sessions (it holds no per-user state)"""
+    return GeometryEngine()
+
+@st.cache_resource
+def _renderer() -> GraphRenderer:
+    """Renderer shared by all sessions (it holds no per-user state)"""
+    return GraphRenderer()
+
+# Commands offered in the top bar
+ACTIONS = [
+    "Start Triangle (S)",
+    "Add Random (R)",
+    "Add Manual (A)",
+    "Center Graph (C)",
+    "Toggle Display (T)",
+    "Zoom In (Z+)",
+    "Zoom Out (Z-)"
+]
+
+# Instruction text for the help expander
+INSTRUCTIONS_COMMANDS = """
+**Commands:**
+- **S**: Start with triangle
+- **R**: Add random vertex
+- **A**: Add vertex manually
+- **C**: Center graph
+- **T**: Toggle display mode
+- **G**: Hide vertices
+- **Z+/-**: Zoom in/out
+"""
+
+INSTRUCTIONS_MOUSE = """
+**Mouse:**
+- **Left drag**: Pan graph
+- **Click**: Select vertices (manual mode)
+
+**Status:**
+"""
+
 # Initialize session state
 if 'graph' not in st.session_state:
+    st.session_state.setdefault('add_manual_mode', False)
+    st.session_state.setdefault('selected_vertices', [])
     st.session_state.graph = PlanarGraph()
-    st.session_state.geometry = GeometryEngine()
-    st.session_state.renderer = GraphRenderer()
+    st.session_state.geometry = _geometry()
+    st.session_state.renderer = _renderer()
     st.session_state.commands = CommandProcessor(st.session_state.graph, st.session_state.geometry)
     st.session_state.view_mode = 'color'  # 'color' or 'index'
     st.session_state.hidden_threshold = None
     st.session_state.zoom_level = 1.0
+    st.session_state.pending_zoom = 0  # Zoom steps not yet applied
     st.session_state.pan_offset = [0, 0]
+    st.session_state.pending_pan = (0, 0)  # Pan delta not yet applied
     st.session_state.canvas_size = [1400, 800]  # Larger default size for full screen
 
-def main():
-    st.set_page_config(
-        page_title="Planar Graph Visualizer",
-        page_icon="🔗",
-        layout="wide",
-        initial_sidebar_state="collapsed"
+def _graph_counts(graph: PlanarGraph) -> Tuple[int, int, int]:
+    """Vertex, edge and periphery counts, cached per graph version"""
+    return graph.cached('counts', lambda: (len(graph.vertices), len(graph.edges), len(graph.periphery)))
+
+def _edge_stats(graph: PlanarGraph) -> Dict[str, float]:
+    """Edge length statistics, cached per graph version"""
+    return graph.cached('edge_stats', graph.get_edge_length_stats)
+
+def _export_bytes(graph: PlanarGraph) -> bytes:
+    """Serialized graph JSON, encoded once per graph version"""
+    return graph.cached('export_bytes', lambda: utils.dumps_json(graph.to_dict()))
+
+def _stats_table(stats: Dict[str, object]) -> str:
+    """Format label/value pairs as a one-row markdown table"""
+    header = " | ".join(stats)
+    align = "|".join("-:" for _ in stats)
+    row = " | ".join(str(value) for value in stats.values())
+    return f"| {header} |\n|{align}|\n| {row} |"
+
+def _view_state() -> Tuple:
+    """Snapshot of the state that the page outside the fragments depends on"""
+    return (
+        st.session_state.graph.version,
+        st.session_state.zoom_level,
+        tuple(st.session_state.pan_offset),
+        st.session_state.view_mode,
+        st.session_state.hidden_threshold,
+        st.session_state.add_manual_mode,
+        st.session_state.pending_zoom
     )
+
+def _rerun():
+    """
+    Rerun the whole app if the canvas or status line is stale, otherwise
+    only the calling fragment
+    """
+    if _view_state() != st.session_state.get('last_view_state'):
+        st.rerun()
     
-    # Top control bar for full screen layout
-    st.markdown("### 🔗 Planar Triangulated Graph Visualizer")
-    
-    # Compact control buttons in columns
-    col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns(9)
-    
-    with col1:
-        if st.button("Start Triangle (S)", help="Create initial triangle with 3 vertices", use_container_width=True):
-            st.session_state.commands.start_triangle()
-            st.rerun()
-    
-    with col2:
-        if st.button("Add Random (R)", help="Add random vertex to periphery", use_container_width=True):
-            st.session_state.commands.add_random_vertex()
-            st.rerun()
-    
-    with col3:
-        if st.button("Add Manual (A)", help="Add vertex manually", use_container_width=True):
-            st.session_state.add_manual_mode = True
-            st.rerun()
-    
-    with col4:
-        if st.button("Center Graph (C)", help="Center and fit graph to screen", use_container_width=True):
-            st.session_state.commands.center_graph(st.session_state.canvas_size)
-            st.rerun()
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # The fragment is running as part of a full app run
+        st.rerun()
+
+def _queue_action():
+    """
+    Move the clicked command out of the pills widget, so the pills act like
+    buttons and the same command can be picked again
+    """
+    st.session_state.pending_action = st.session_state.action
+    st.session_state.action = None
+
+@st.fragment
+def control_bar():
+    """Top bar of command buttons, the hide threshold and the info popover"""
+    graph = st.session_state.graph
+    num_vertices, num_edges, num_periphery = _graph_counts(graph)
     
-    with col5:
-        if st.button("Toggle Display (T)", help="Switch between color and index display", use_container_width=True):
-            st.session_state.view_mode = 'index' if st.session_state.view_mode == 'color' else 'color'
-            st.rerun()
+    # All commands share one pills widget instead of a button per command
+    col_actions, col_hide, col_info = st.columns([7, 1, 1])
     
-    with col6:
-        if st.button("Zoom In (Z+)", use_container_width=True):
-            st.session_state.zoom_level = min(st.session_state.zoom_level * 1.2, 5.0)
-            st.rerun()
+    with col_actions:
+        st.pills(
+            "Commands",
+            ACTIONS,
+            selection_mode="single",
+            default=None,
+            key="action",
+            on_change=_queue_action,
+            label_visibility="collapsed"
+        )
     
-    with col7:
-        if st.button("Zoom Out (Z-)", use_container_width=True):
-            st.session_state.zoom_level = max(st.session_state.zoom_level / 1.2, 0.1)
-            st.rerun()
+    action = st.session_state.pop('pending_action', None)
+    if action == "Start Triangle (S)":
+        st.session_state.commands.start_triangle()
+        _rerun()
+    elif action == "Add Random (R)":
+        st.session_state.commands.add_random_vertex()
+        _rerun()
+    elif action == "Add Manual (A)":
+        st.session_state.add_manual_mode = True
+        _rerun()
+    elif action == "Center Graph (C)":
+        st.session_state.commands.center_graph(st.session_state.canvas_size)
+        _rerun()
+    elif action == "Toggle Display (T)":
+        st.session_state.view_mode = 'index' if st.session_state.view_mode == 'color' else 'color'
+        _rerun()
+    elif action == "Zoom In (Z+)":
+        st.session_state.pending_zoom += 1
+        _rerun()
+    elif action == "Zoom Out (Z-)":
+        st.session_state.pending_zoom -= 1
+        _rerun()
     
-    with col8:
-        # Hide vertices control
+    with col_hide:
+        # Hide vertices control; a threshold kept from a larger graph is
+        # clamped so it never exceeds the current maximum
+        max_index = max(num_vertices, 1)
+        hidden_threshold = st.session_state.hidden_threshold
         hide_threshold = st.number_input(
             "Hide > index", 
             min_value=0, 
-            max_value=max(len(st.session_state.graph.vertices), 1),
-            value=len(st.session_state.graph.vertices) if st.session_state.hidden_threshold is None else st.session_state.hidden_threshold,
+            max_value=max_index,
+            value=num_vertices if hidden_threshold is None else min(hidden_threshold, max_index),
             help="Hide vertices with index greater than this value",
             label_visibility="collapsed"
         )
         if st.button("Apply", use_container_width=True):
             st.session_state.hidden_threshold = hide_threshold
-            st.rerun()
+            _rerun()
     
-    with col9:
+    with col_info:
         # Graph stats and export
         with st.popover("📊 Info & Export"):
-            st.metric("Vertices", len(st.session_state.graph.vertices))
-            st.metric("Edges", len(st.session_state.graph.edges))
-            st.metric("Periphery", len(st.session_state.graph.periphery))
+            # One markdown element instead of a metric widget per value
+            st.markdown(_stats_table({
+                "Vertices": num_vertices,
+                "Edges": num_edges,
+                "Periphery": num_periphery
+            }))
             
             if st.button("Export Graph"):
-                graph_data = st.session_state.graph.to_dict()
                 st.download_button(
                     "Download JSON",
-                    json.dumps(graph_data, indent=2),
+                    _export_bytes(graph),
                     "graph.json",
                     "application/json"
                 )
@@ -102,12 +200,97 @@ def main():
             uploaded_file = st.file_uploader("Import Graph", type="json")
             if uploaded_file is not None:
                 try:
-                    graph_data = json.load(uploaded_file)
+                    graph_data = utils.loads_json(uploaded_file.getvalue())
                     st.session_state.graph.from_dict(graph_data)
                     st.success("Graph imported successfully!")
-                    st.rerun()
+                    _rerun()
                 except Exception as e:
                     st.error(f"Error importing graph: {e}")
+
+@st.fragment
+def sidebar_controls():
+    """Graph status and advanced operations shown in the sidebar"""
+    graph = st.session_state.graph
+    num_vertices, num_edges, num_periphery = _graph_counts(graph)
+    
+    st.header("Advanced Controls")
+    st.write("Detailed controls and graph information")
+    
+    # Graph validation status
+    st.subheader("Graph Status")
+    stats = {
+        "Vertices": num_vertices,
+        "Edges": num_edges,
+        "Periphery": num_periphery
+    }
+    
+    # Edge statistics
+    if num_edges:
+        edge_stats = _edge_stats(graph)
+        stats["Avg len"] = f"{edge_stats['mean']:.1f}"
+    
+    st.markdown(_stats_table(stats))
+    
+    # Advanced operations
+    st.subheader("Advanced Operations")
+    if st.button("Show All Vertices"):
+        st.session_state.hidden_threshold = None
+        _rerun()
+    
+    if st.button("Reset Zoom & Pan"):
+        st.session_state.zoom_level = 1.0
+        st.session_state.pan_offset = [0, 0]
+        _rerun()
+
+@st.fragment
+def graph_canvas():
+    """
+    Interactive graph canvas; events from the canvas rerun only this fragment
+    """
+    # Fold the pan deltas from a drag into a single offset update
+    dx, dy = st.session_state.pending_pan
+    if dx or dy:
+        pan_x, pan_y = st.session_state.pan_offset
+        st.session_state.pan_offset = [pan_x + dx, pan_y + dy]
+        st.session_state.pending_pan = (0, 0)
+    
+    st.session_state.last_view_state = _view_state()
+    canvas_result = st.session_state.renderer.render_interactive_canvas(
+        st.session_state.graph,
+        st.session_state.canvas_size,
+        st.session_state.zoom_level,
+        st.session_state.pan_offset,
+        st.session_state.view_mode,
+        st.session_state.hidden_threshold
+    )
+    
+    # Handle canvas interactions
+    if canvas_result.json_data is not None:
+        # Process mouse interactions
+        handle_canvas_interaction(canvas_result.json_data)
+
+def main():
+    st.set_page_config(
+        page_title="Planar Graph Visualizer",
+        page_icon="🔗",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    
+    # Apply zoom clicks accumulated since the last full run in one step, so a
+    # burst of clicks interrupting each other renders the canvas only once
+    if st.session_state.pending_zoom:
+        st.session_state.zoom_level = utils.clamp(
+            st.session_state.zoom_level * 1.2 ** st.session_state.pending_zoom, 0.1, 5.0
+        )
+        st.session_state.pending_zoom = 0
+    
+    # Top control bar for full screen layout
+    st.markdown("### 🔗 Planar Triangulated Graph Visualizer")
+    
+    # The control bar and sidebar are fragments: widgets that don't change
+    # the canvas (popover, hide threshold input) only rerun their fragment
+    control_bar()
     
     # Status line
     status_col1, status_col2, status_col3 = st.columns([2, 2, 4])
@@ -116,7 +299,7 @@ def main():
     with status_col2:
         st.write(f"Zoom: {st.session_state.zoom_level:.1f}x")
     with status_col3:
-        if hasattr(st.session_state, 'add_manual_mode') and st.session_state.add_manual_mode:
+        if st.session_state.add_manual_mode:
             st.warning("Manual add mode: Click two periphery vertices in clockwise order")
             if st.button("Cancel Manual Add", type="secondary"):
                 st.session_state.add_manual_mode = False
@@ -125,53 +308,9 @@ def main():
     
     # Optional sidebar (collapsed by default) for advanced controls
     with st.sidebar:
-        st.header("Advanced Controls")
-        st.write("Detailed controls and graph information")
-        
-        # Graph validation status
-        st.subheader("Graph Status")
-        st.metric("Vertices", len(st.session_state.graph.vertices))
-        st.metric("Edges", len(st.session_state.graph.edges))
-        st.metric("Periphery Size", len(st.session_state.graph.periphery))
-        
-        # Edge statistics
-        if st.session_state.graph.edges:
-            edge_stats = st.session_state.graph.get_edge_length_stats()
-            st.metric("Avg Edge Length", f"{edge_stats['mean']:.1f}")
-        
-        # Advanced operations
-        st.subheader("Advanced Operations")
-        if st.button("Show All Vertices"):
-            st.session_state.hidden_threshold = None
-            st.rerun()
-        
-        if st.button("Reset Zoom & Pan"):
-            st.session_state.zoom_level = 1.0
-            st.session_state.pan_offset = [0, 0]
-            st.rerun()
+        sidebar_controls()
     
     # Full screen canvas
-    # Get viewport dimensions for full screen canvas
-    import streamlit.components.v1 as components
-    
-    # JavaScript to get viewport dimensions
-    viewport_js = """
-    <script>
-    function sendViewportSize() {
-        const width = window.innerWidth;
-        const height = window.innerHeight;
-        window.parent.postMessage({
-            type: 'viewport_size',
-            width: width - 50,  // Account for padding
-            height: height - 150  // Account for header and controls
-        }, '*');
-    }
-    sendViewportSize();
-    window.addEventListener('resize', sendViewportSize);
-    </script>
-    """
-    components.html(viewport_js, height=0)
-    
     # Update canvas size to be full screen
     if 'viewport_width' not in st.session_state:
         st.session_state.viewport_width = 1400
@@ -182,45 +321,18 @@ def main():
     st.session_state.canvas_size = [st.session_state.viewport_width, st.session_state.viewport_height]
     
     # Canvas for graph visualization (full width)
-    canvas_result = st.session_state.renderer.render_interactive_canvas(
-        st.session_state.graph,
-        st.session_state.canvas_size,
-        st.session_state.zoom_level,
-        st.session_state.pan_offset,
-        st.session_state.view_mode,
-        st.session_state.hidden_threshold
-    )
-    
-    # Handle canvas interactions
-    if canvas_result.json_data is not None:
-        # Process mouse interactions
-        handle_canvas_interaction(canvas_result.json_data)
+    graph_canvas()
     
     # Instructions in an expander to save space
     with st.expander("📖 Instructions & Controls", expanded=False):
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown("""
-            **Commands:**
-            - **S**: Start with triangle
-            - **R**: Add random vertex
-            - **A**: Add vertex manually
-            - **C**: Center graph
-            - **T**: Toggle display mode
-            - **G**: Hide vertices
-            - **Z+/-**: Zoom in/out
-            """)
+            st.markdown(INSTRUCTIONS_COMMANDS)
         with col2:
-            st.markdown("""
-            **Mouse:**
-            - **Left drag**: Pan graph
-            - **Click**: Select vertices (manual mode)
-            
-            **Status:**
-            """)
-            if hasattr(st.session_state, 'add_manual_mode') and st.session_state.add_manual_mode:
+            st.markdown(INSTRUCTIONS_MOUSE)
+            if st.session_state.add_manual_mode:
                 st.info("Manual add mode: Click two periphery vertices in clockwise order")
-                if st.button("Cancel Manual Add"):
+                if st.button("Cancel Manual Add", key="cancel_manual_add_help"):
                     st.session_state.add_manual_mode = False
                     st.session_state.selected_vertices = []
                     st.rerun()
@@ -230,38 +342,45 @@ def handle_canvas_interaction(interaction_data):
     if not interaction_data:
         return
     
+    manual_mode = st.session_state.add_manual_mode
+    pan_data = interaction_data.get('pan')
+    
+    # Most canvas events are neither vertex picks nor pans
+    if not manual_mode and pan_data is None:
+        return
+    
     # Handle vertex selection for manual addition
-    if hasattr(st.session_state, 'add_manual_mode') and st.session_state.add_manual_mode:
-        if 'objects' in interaction_data:
-            for obj in interaction_data['objects']:
-                if obj.get('type') == 'circle':  # Vertex clicked
-                    vertex_id = obj.get('vertex_id')
-                    if vertex_id and vertex_id in st.session_state.graph.periphery:
-                        if not hasattr(st.session_state, 'selected_vertices'):
-                            st.session_state.selected_vertices = []
-                        
-                        if len(st.session_state.selected_vertices) < 2:
-                            st.session_state.selected_vertices.append(vertex_id)
-                            
-                            if len(st.session_state.selected_vertices) == 2:
-                                # Add vertex between selected periphery vertices
-                                v1, v2 = st.session_state.selected_vertices
-                                try:
-                                    st.session_state.commands.add_manual_vertex(v1, v2)
-                                    st.success(f"Added vertex between {v1} and {v2}")
-                                except Exception as e:
-                                    st.error(f"Error adding vertex: {e}")
-                                finally:
-                                    st.session_state.add_manual_mode = False
-                                    st.session_state.selected_vertices = []
-                                    st.rerun()
+    if manual_mode:
+        graph = st.session_state.graph
+        selected = st.session_state.selected_vertices
+        circles = (obj for obj in interaction_data.get('objects', ()) if obj.get('type') == 'circle')
+        for obj in circles:  # Vertex clicked
+            vertex_id = obj.get('vertex_id')
+            if not vertex_id or not graph.contains_periphery(vertex_id):
+                continue
+            
+            selected.append(vertex_id)
+            if len(selected) == 2:
+                # Add vertex between selected periphery vertices
+                v1, v2 = selected
+                try:
+                    st.session_state.commands.add_manual_vertex(v1, v2)
+                    st.success(f"Added vertex between {v1} and {v2}")
+                except Exception as e:
+                    st.error(f"Error adding vertex: {e}")
+                finally:
+                    st.session_state.add_manual_mode = False
+                    st.session_state.selected_vertices = []
+                break  # Stop after the second pick
+        
+        if not st.session_state.add_manual_mode:
+            st.rerun()
     
-    # Handle pan operations
-    if 'pan' in interaction_data:
-        pan_data = interaction_data['pan']
-        st.session_state.pan_offset[0] += pan_data.get('dx', 0)
-        st.session_state.pan_offset[1] += pan_data.get('dy', 0)
-        st.rerun()
+    # Accumulate pan deltas; the next run applies them all at once instead
+    # of rerunning the script for every mouse move
+    if pan_data is not None:
+        dx, dy = st.session_state.pending_pan
+        st.session_state.pending_pan = (dx + pan_data.get('dx', 0), dy + pan_data.get('dy', 0))
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,5 @@
 import random
+from collections import deque
 from typing import Tuple, Optional
 from graph_model import PlanarGraph
 from geometry import GeometryEngine
@@ -44,8 +45,8 @@ class CommandProcessor:
             for seg_vertex_id in segment:
                 self.graph.add_edge(vertex_id, seg_vertex_id)
             
-            # Apply redraw logic
-            self.geometry.apply_redraw_logic(self.graph)
+            # Apply redraw logic around the new vertex
+            self.geometry.apply_redraw_logic(self.graph, vertex_id)
             
             st.success(f"Added random vertex {vertex_id} between periphery vertices {periphery_start} and {periphery_end}")
             return True
@@ -60,11 +61,11 @@ class CommandProcessor:
         """
         try:
             # Validate periphery vertices
-            if periphery_start not in self.graph.periphery:
+            if not self.graph.contains_periphery(periphery_start):
                 st.error(f"Vertex {periphery_start} is not on the periphery")
                 return False
             
-            if periphery_end not in self.graph.periphery:
+            if not self.graph.contains_periphery(periphery_end):
                 st.error(f"Vertex {periphery_end} is not on the periphery")
                 return False
             
@@ -84,8 +85,8 @@ class CommandProcessor:
             for seg_vertex_id in segment:
                 self.graph.add_edge(vertex_id, seg_vertex_id)
             
-            # Apply redraw logic
-            self.geometry.apply_redraw_logic(self.graph)
+            # Apply redraw logic around the new vertex
+            self.geometry.apply_redraw_logic(self.graph, vertex_id)
             
             st.success(f"Added manual vertex {vertex_id} between periphery vertices {periphery_start} and {periphery_end}")
             return True
@@ -202,6 +203,14 @@ class CommandProcessor:
         Validate the integrity of the current graph
         """
         try:
+            # A simple planar graph has at most 3V - 6 edges (Euler's formula),
+            # which rules out dense graphs before the full planarity check
+            num_vertices = len(self.graph.vertices)
+            num_edges = len(self.graph.edges)
+            if num_vertices >= 3 and num_edges > 3 * num_vertices - 6:
+                st.error(f"Graph planarity violated: {num_edges} edges exceeds 3V - 6 = {3 * num_vertices - 6}")
+                return False
+            
             # Check basic graph properties
             if not self.graph.validate_planarity():
                 st.error("Graph planarity violated")
@@ -212,17 +221,21 @@ class CommandProcessor:
                 st.error("Invalid periphery configuration")
                 return False
             
-            # Check for isolated vertices
-            for vertex_id in self.graph.vertices:
-                if len(self.graph.get_neighbors(vertex_id)) == 0 and len(self.graph.vertices) > 1:
-                    st.error(f"Isolated vertex found: {vertex_id}")
-                    return False
-            
-            # Check edge consistency
+            # Check edge consistency, counting degrees in the same pass
+            degree = dict.fromkeys(self.graph.vertices, 0)
             for edge in self.graph.edges:
-                if edge.v1_id not in self.graph.vertices or edge.v2_id not in self.graph.vertices:
+                if edge.v1_id not in degree or edge.v2_id not in degree:
                     st.error(f"Edge references non-existent vertex: {edge.id}")
                     return False
+                degree[edge.v1_id] += 1
+                degree[edge.v2_id] += 1
+            
+            # Check for isolated vertices
+            if len(degree) > 1:
+                for vertex_id, count in degree.items():
+                    if count == 0:
+                        st.error(f"Isolated vertex found: {vertex_id}")
+                        return False
             
             st.success("Graph integrity validated")
             return True
@@ -236,17 +249,16 @@ class CommandProcessor:
         Get the history of executed commands
         """
         # Initialize command history if not exists
-        if 'command_history' not in st.session_state:
-            st.session_state.command_history = []
+        history = st.session_state.setdefault('command_history', deque(maxlen=50))
         
-        return st.session_state.command_history
+        return list(history)
     
     def add_to_command_history(self, command: str, success: bool, details: str = ""):
         """
         Add a command to the history
         """
-        if 'command_history' not in st.session_state:
-            st.session_state.command_history = []
+        # Bounded to the last 50 commands; older entries drop off automatically
+        history = st.session_state.setdefault('command_history', deque(maxlen=50))
         
         entry = {
             'command': command,
@@ -260,28 +272,23 @@ class CommandProcessor:
             }
         }
         
-        st.session_state.command_history.append(entry)
-        
-        # Keep only last 50 commands
-        if len(st.session_state.command_history) > 50:
-            st.session_state.command_history = st.session_state.command_history[-50:]
+        history.append(entry)
     
     def _get_random_color_index(self) -> int:
         """
         Get a random color index (1-4)
         """
-        return random.randint(1, 4)
+        return random.randrange(1, 5)
     
     def _are_periphery_adjacent(self, v1_id: int, v2_id: int) -> bool:
         """
         Check if two vertices are adjacent on the periphery
         """
-        if v1_id not in self.graph.periphery or v2_id not in self.graph.periphery:
+        idx1 = self.graph.periphery_position(v1_id)
+        idx2 = self.graph.periphery_position(v2_id)
+        if idx1 is None or idx2 is None:
             return False
         
-        idx1 = self.graph.periphery.index(v1_id)
-        idx2 = self.graph.periphery.index(v2_id)
-        
         # Check if they are consecutive (considering wrap-around)
         return (abs(idx1 - idx2) == 1 or 
                 abs(idx1 - idx2) == len(self.graph.periphery) - 1)
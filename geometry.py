@@ -1,5 +1,6 @@
 import numpy as np
 import math
+import random
 from typing import List, Tuple, Dict, Optional
 from graph_model import PlanarGraph, Vertex
 
@@ -12,6 +13,9 @@ class GeometryEngine:
         self.min_angle = math.radians(60)  # Minimum angle constraint
         self.edge_length_tolerance = 0.2  # ±20% edge length variation
         self.vertex_separation = 20  # Minimum distance between vertices
+        # Rotation applied to each side of a too-sharp angle
+        self._rot_cos = math.cos(self.min_angle / 4)
+        self._rot_sin = math.sin(self.min_angle / 4)
     
     def calculate_vertex_position(self, graph: PlanarGraph, periphery_start: int, 
                                 periphery_end: int) -> Tuple[float, float]:
@@ -39,28 +43,29 @@ class GeometryEngine:
         end_vertex = graph.vertices[periphery_end]
         
         # Vector from start to end
-        segment_vector = np.array([end_vertex.x - start_vertex.x, 
-                                 end_vertex.y - start_vertex.y])
+        seg_dx = end_vertex.x - start_vertex.x
+        seg_dy = end_vertex.y - start_vertex.y
+        seg_length = math.hypot(seg_dx, seg_dy)
         
         # Perpendicular vector (outward from graph)
-        if np.linalg.norm(segment_vector) > 0:
-            segment_vector = segment_vector / np.linalg.norm(segment_vector)
-            perpendicular = np.array([-segment_vector[1], segment_vector[0]])
+        if seg_length > 0:
+            perp_x, perp_y = -seg_dy / seg_length, seg_dx / seg_length
         else:
-            perpendicular = np.array([0, 1])
+            perp_x, perp_y = 0.0, 1.0
         
         # Determine which direction is outward
         graph_center = self._calculate_graph_center(graph)
-        to_center = np.array([graph_center[0] - centroid_x, graph_center[1] - centroid_y])
+        to_center_x = graph_center[0] - centroid_x
+        to_center_y = graph_center[1] - centroid_y
         
         # Choose perpendicular direction away from center
-        if np.dot(perpendicular, to_center) > 0:
-            perpendicular = -perpendicular
+        if perp_x * to_center_x + perp_y * to_center_y > 0:
+            perp_x, perp_y = -perp_x, -perp_y
         
         # Calculate position
         distance = avg_edge_length * 1.1  # Slightly longer for convexity
-        new_x = centroid_x + perpendicular[0] * distance
-        new_y = centroid_y + perpendicular[1] * distance
+        new_x = centroid_x + perp_x * distance
+        new_y = centroid_y + perp_y * distance
         
         # Ensure minimum separation from existing vertices
         new_x, new_y = self._ensure_vertex_separation(graph, new_x, new_y)
@@ -75,8 +80,7 @@ class GeometryEngine:
             raise ValueError("Need at least 2 periphery vertices")
         
         # Choose random adjacent pair on periphery
-        import random
-        start_idx = random.randint(0, len(graph.periphery) - 1)
+        start_idx = random.randrange(len(graph.periphery))
         end_idx = (start_idx + 1) % len(graph.periphery)
         
         periphery_start = graph.periphery[start_idx]
@@ -86,154 +90,280 @@ class GeometryEngine:
         
         return periphery_start, periphery_end, x, y
     
-    def apply_redraw_logic(self, graph: PlanarGraph):
+    def apply_redraw_logic(self, graph: PlanarGraph, newly_added: Optional[int] = None):
         """
-        Apply redraw logic to maintain convexity and uniform edge lengths
+        Apply redraw logic to maintain convexity and uniform edge lengths.
+        When newly_added is given, angles and edge lengths are only rebalanced
+        around that vertex and its neighbours, the only part a single insert disturbs
         """
         if len(graph.vertices) < 3:
             return
         
+        region = None
+        if newly_added is not None and newly_added in graph.vertices:
+            region = [newly_added, *graph.get_neighbors(newly_added)]
+        
         # Update periphery first
         graph.update_periphery()
         
         # Rebalance angular spacing
-        self._rebalance_angular_spacing(graph)
+        self._rebalance_angular_spacing(graph, region)
         
         # Adjust edge lengths
-        self._adjust_edge_lengths(graph)
+        self._adjust_edge_lengths(graph, region)
         
         # Maintain convex contour
         self._maintain_convex_contour(graph)
         
         # Update vertex diameters if needed
         self._update_vertex_diameters(graph)
+        
+        graph.mark_changed()
     
-    def _rebalance_angular_spacing(self, graph: PlanarGraph):
-        """Rebalance angular spacing between connected vertices"""
-        for vertex_id, vertex in graph.vertices.items():
+    def _rebalance_angular_spacing(self, graph: PlanarGraph, region: Optional[List[int]] = None):
+        """Rebalance angular spacing between connected vertices (only those in region, if given)"""
+        if region is None:
+            # Vectorised pre-pass over the current positions; only vertices with a
+            # sharp angle, or whose neighbourhood has moved since, need the exact check
+            candidates = zip(graph.vertices, self._find_sharp_vertices(graph).tolist())
+        else:
+            candidates = ((vertex_id, True) for vertex_id in region)
+        moved = set()
+        verts = graph.vertices
+        min_angle = self.min_angle
+        
+        for vertex_id, flagged in candidates:
             neighbors = list(graph.get_neighbors(vertex_id))
             
             if len(neighbors) < 2:
                 continue
             
+            if not flagged and vertex_id not in moved and moved.isdisjoint(neighbors):
+                continue
+            
             # Calculate current angles to neighbors
+            vertex = verts[vertex_id]
+            vx, vy = vertex.x, vertex.y
             angles = []
             for neighbor_id in neighbors:
-                neighbor = graph.vertices[neighbor_id]
-                angle = math.atan2(neighbor.y - vertex.y, neighbor.x - vertex.x)
-                angles.append((angle, neighbor_id))
+                neighbor = verts[neighbor_id]
+                angles.append((math.atan2(neighbor.y - vy, neighbor.x - vx), neighbor_id))
             
             # Sort by angle
             angles.sort()
             
             # Check for sharp angles and adjust if needed
-            for i in range(len(angles)):
-                curr_angle = angles[i][0]
-                next_angle = angles[(i + 1) % len(angles)][0]
+            count = len(angles)
+            for i in range(count):
+                curr_angle, neighbor1_id = angles[i]
+                next_angle, neighbor2_id = angles[(i + 1) % count]
                 
                 angle_diff = next_angle - curr_angle
                 if angle_diff < 0:
                     angle_diff += 2 * math.pi
                 
-                if angle_diff < self.min_angle:
+                if angle_diff < min_angle:
                     # Adjust positions to meet minimum angle requirement
-                    self._adjust_for_minimum_angle(graph, vertex_id, angles[i][1], angles[(i + 1) % len(angles)][1])
+                    self._adjust_for_minimum_angle(graph, vertex_id, neighbor1_id, neighbor2_id)
+                    moved.add(neighbor1_id)
+                    moved.add(neighbor2_id)
+    
+    def _find_sharp_vertices(self, graph: PlanarGraph) -> np.ndarray:
+        """Flag, per vertex row, whether any two cyclically adjacent neighbours are closer than min_angle"""
+        xs, ys, _, _ = self._sync_arrays(graph)
+        off, nbrs = graph.adjacency_csr()
+        degrees = np.diff(off)
+        sharp = np.zeros(len(xs), dtype=bool)
+        if len(nbrs) == 0:
+            return sharp
+        
+        centers = np.repeat(np.arange(len(xs)), degrees)
+        angles = np.arctan2(ys[nbrs] - ys[centers], xs[nbrs] - xs[centers])
+        
+        # Sort angles within each vertex's slice, then diff each against its
+        # cyclic successor (the last one wraps to the first of the slice)
+        angles = angles[np.lexsort((angles, centers))]
+        succ = np.arange(1, len(angles) + 1)
+        ends = off[1:][degrees > 0]
+        succ[ends - 1] = off[:-1][degrees > 0]
+        diffs = angles[succ] - angles
+        diffs[diffs < 0] += 2 * math.pi
+        
+        np.logical_or.at(sharp, centers, diffs < self.min_angle)
+        sharp[degrees < 2] = False
+        return sharp
     
-    def _adjust_edge_lengths(self, graph: PlanarGraph):
-        """Adjust vertex positions to maintain uniform edge lengths"""
+    def _adjust_edge_lengths(self, graph: PlanarGraph, region: Optional[List[int]] = None):
+        """Adjust vertex positions to maintain uniform edge lengths (only edges touching region, if given)"""
         target_length = self._calculate_average_edge_length(graph)
         
         if target_length == 0:
             return
         
-        # Iterative adjustment
+        xs, ys, e_v1, e_v2 = self._sync_arrays(graph)
+        xs, ys = xs.copy(), ys.copy()  # The cached arrays belong to the current version
+        n = len(xs)
+        half_target = target_length / 2
+        changed = np.zeros(n, dtype=bool)
+        
+        if region is not None:
+            # Narrow the edge arrays once instead of masking every sweep
+            in_region = np.isin(np.fromiter(graph.vertices, dtype=np.int64, count=n), region)
+            selected = in_region[e_v1] | in_region[e_v2]
+            e_v1, e_v2 = e_v1[selected], e_v2[selected]
+        
+        # Iterative adjustment as Jacobi sweeps: every edge outside tolerance proposes
+        # new endpoints from the same positions, and each vertex moves by the
+        # average of the proposals it received
         for iteration in range(3):  # Limit iterations to prevent excessive computation
-            for edge in graph.edges:
-                v1 = graph.vertices[edge.v1_id]
-                v2 = graph.vertices[edge.v2_id]
-                
-                current_length = v1.distance_to(v2)
-                length_ratio = current_length / target_length
-                
-                # Only adjust if outside tolerance
-                if abs(length_ratio - 1.0) > self.edge_length_tolerance:
-                    # Move vertices closer to target length
-                    center_x = (v1.x + v2.x) / 2
-                    center_y = (v1.y + v2.y) / 2
-                    
-                    direction = np.array([v2.x - v1.x, v2.y - v1.y])
-                    if np.linalg.norm(direction) > 0:
-                        direction = direction / np.linalg.norm(direction)
-                        
-                        half_target = target_length / 2
-                        
-                        v1.update_position(center_x - direction[0] * half_target,
-                                         center_y - direction[1] * half_target)
-                        v2.update_position(center_x + direction[0] * half_target,
-                                         center_y + direction[1] * half_target)
+            dx = xs[e_v2] - xs[e_v1]
+            dy = ys[e_v2] - ys[e_v1]
+            lengths = np.hypot(dx, dy)
+            
+            # Only adjust if outside tolerance
+            mask = (np.abs(lengths / target_length - 1.0) > self.edge_length_tolerance) & (lengths > 0)
+            if not mask.any():
+                break
+            
+            v1, v2 = e_v1[mask], e_v2[mask]
+            scale = half_target / lengths[mask]
+            center_x = (xs[v1] + xs[v2]) / 2
+            center_y = (ys[v1] + ys[v2]) / 2
+            offset_x = dx[mask] * scale
+            offset_y = dy[mask] * scale
+            
+            # One scatter per coordinate over both endpoint lists
+            rows = np.concatenate((v1, v2))
+            shift_x = np.bincount(rows, np.concatenate((center_x - offset_x - xs[v1],
+                                                        center_x + offset_x - xs[v2])), n)
+            shift_y = np.bincount(rows, np.concatenate((center_y - offset_y - ys[v1],
+                                                        center_y + offset_y - ys[v2])), n)
+            counts = np.bincount(rows, minlength=n)
+            
+            moved = counts > 0
+            xs[moved] += shift_x[moved] / counts[moved]
+            ys[moved] += shift_y[moved] / counts[moved]
+            changed |= moved
+        
+        if changed.any():
+            self._write_positions(graph, xs, ys)
     
     def _maintain_convex_contour(self, graph: PlanarGraph):
         """Ensure the periphery maintains a convex contour"""
         if len(graph.periphery) < 3:
             return
         
-        # Check each triplet of consecutive periphery vertices
-        for i in range(len(graph.periphery)):
-            prev_id = graph.periphery[i - 1]
-            curr_id = graph.periphery[i]
-            next_id = graph.periphery[(i + 1) % len(graph.periphery)]
+        verts = graph.vertices
+        periphery = graph.periphery
+        n = len(periphery)
+        
+        # Vectorised pre-pass: cross product at every periphery vertex at once
+        ring = [verts[vid] for vid in periphery]
+        px = np.fromiter((v.x for v in ring), dtype=np.float64, count=n)
+        py = np.fromiter((v.y for v in ring), dtype=np.float64, count=n)
+        cross = ((px - np.roll(px, 1)) * (np.roll(py, -1) - py) -
+                 (py - np.roll(py, 1)) * (np.roll(px, -1) - px))
+        concave = (cross < 0).tolist()
+        adjusted = [False] * n
+        
+        # Check each triplet of consecutive periphery vertices. Only concave ones,
+        # or ones next to a vertex that was just moved, need the exact check
+        for i in range(n):
+            if not (concave[i] or adjusted[i - 1] or (i == n - 1 and adjusted[0])):
+                continue
             
-            prev_vertex = graph.vertices[prev_id]
-            curr_vertex = graph.vertices[curr_id]
-            next_vertex = graph.vertices[next_id]
+            prev_id = periphery[i - 1]
+            curr_id = periphery[i]
+            next_id = periphery[(i + 1) % n]
+            
+            prev_vertex = verts[prev_id]
+            curr_vertex = verts[curr_id]
+            next_vertex = verts[next_id]
+            curr_x, curr_y = curr_vertex.x, curr_vertex.y
             
             # Calculate cross product to check convexity
             cross = self._cross_product_2d(
-                (curr_vertex.x - prev_vertex.x, curr_vertex.y - prev_vertex.y),
-                (next_vertex.x - curr_vertex.x, next_vertex.y - curr_vertex.y)
+                (curr_x - prev_vertex.x, curr_y - prev_vertex.y),
+                (next_vertex.x - curr_x, next_vertex.y - curr_y)
             )
             
             # If cross product is negative, we have a concave angle
             if cross < 0:
                 # Adjust current vertex position to maintain convexity
                 self._adjust_for_convexity(graph, prev_id, curr_id, next_id)
+                adjusted[i] = True
+    
+    def _sync_arrays(self, graph: PlanarGraph) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get (xs, ys, e_v1, e_v2) arrays for the graph. They are cached on the graph
+        itself, since one engine is shared by every session, and rebuilt when the
+        graph version changes
+        """
+        return graph.edge_arrays()
+    
+    def _write_positions(self, graph: PlanarGraph, xs: np.ndarray, ys: np.ndarray):
+        """Copy positions from row-ordered arrays back onto the vertices"""
+        for vertex, x, y in zip(graph.vertices.values(), xs.tolist(), ys.tolist()):
+            vertex.update_position(x, y)
+        
+        graph.mark_changed()
     
     def _calculate_average_edge_length(self, graph: PlanarGraph) -> float:
-        """Calculate the average edge length in the graph"""
+        """Calculate the average edge length in the graph, memoised per graph version"""
         if not graph.edges:
             return 0
         
-        total_length = 0
-        for edge in graph.edges:
-            v1 = graph.vertices[edge.v1_id]
-            v2 = graph.vertices[edge.v2_id]
-            total_length += v1.distance_to(v2)
+        def compute() -> float:
+            xs, ys, e_v1, e_v2 = self._sync_arrays(graph)
+            return float(np.hypot(xs[e_v1] - xs[e_v2], ys[e_v1] - ys[e_v2]).mean())
         
-        return total_length / len(graph.edges)
+        return graph.cached('average_edge_length', compute)
     
     def _calculate_graph_center(self, graph: PlanarGraph) -> Tuple[float, float]:
-        """Calculate the center point of the graph"""
+        """Calculate the center point of the graph, memoised per graph version"""
         if not graph.vertices:
             return 0, 0
         
-        total_x = sum(v.x for v in graph.vertices.values())
-        total_y = sum(v.y for v in graph.vertices.values())
+        def compute() -> Tuple[float, float]:
+            xs, ys, _, _ = self._sync_arrays(graph)
+            return float(xs.mean()), float(ys.mean())
         
-        return total_x / len(graph.vertices), total_y / len(graph.vertices)
+        return graph.cached('graph_center', compute)
     
     def _ensure_vertex_separation(self, graph: PlanarGraph, x: float, y: float) -> Tuple[float, float]:
         """Ensure new vertex position maintains minimum separation from existing vertices"""
-        for vertex in graph.vertices.values():
-            distance = math.sqrt((x - vertex.x)**2 + (y - vertex.y)**2)
-            if distance < self.vertex_separation:
-                # Move away from the conflicting vertex
-                direction = np.array([x - vertex.x, y - vertex.y])
-                if np.linalg.norm(direction) > 0:
-                    direction = direction / np.linalg.norm(direction)
-                    x = vertex.x + direction[0] * self.vertex_separation
-                    y = vertex.y + direction[1] * self.vertex_separation
-        
-        return x, y
+        if not graph.vertices:
+            return x, y
+        
+        separation = self.vertex_separation
+        xs, ys, _, _ = self._sync_arrays(graph)
+        grid = graph.spatial_grid(separation)
+        
+        # Same result as checking every vertex in order: anything closer than the
+        # separation lies in the 3x3 cells around the point, so jump straight to
+        # the next conflicting vertex after the last one handled
+        last_row = -1
+        while True:
+            cell_x, cell_y = int(x // separation), int(y // separation)
+            conflict = None
+            for gx in (cell_x - 1, cell_x, cell_x + 1):
+                for gy in (cell_y - 1, cell_y, cell_y + 1):
+                    for row in grid.get((gx, gy), ()):
+                        if last_row < row and (conflict is None or row < conflict):
+                            if math.sqrt((x - xs[row])**2 + (y - ys[row])**2) < separation:
+                                conflict = row
+            
+            if conflict is None:
+                return x, y
+            
+            # Move away from the conflicting vertex
+            vx, vy = float(xs[conflict]), float(ys[conflict])
+            dx, dy = x - vx, y - vy
+            length = math.hypot(dx, dy)
+            if length > 0:
+                x = vx + dx / length * separation
+                y = vy + dy / length * separation
+            last_row = conflict
     
     def _cross_product_2d(self, v1: Tuple[float, float], v2: Tuple[float, float]) -> float:
         """Calculate 2D cross product of two vectors"""
@@ -243,39 +373,41 @@ class GeometryEngine:
                                 neighbor1_id: int, neighbor2_id: int):
         """Adjust vertex positions to meet minimum angle requirements"""
         # Simplified adjustment - move neighbors slightly to increase angle
-        center = graph.vertices[center_id]
-        n1 = graph.vertices[neighbor1_id]
-        n2 = graph.vertices[neighbor2_id]
+        verts = graph.vertices
+        center = verts[center_id]
+        n1 = verts[neighbor1_id]
+        n2 = verts[neighbor2_id]
+        center_x, center_y = center.x, center.y
         
         # Calculate bisector direction
-        v1 = np.array([n1.x - center.x, n1.y - center.y])
-        v2 = np.array([n2.x - center.x, n2.y - center.y])
-        
-        if np.linalg.norm(v1) > 0 and np.linalg.norm(v2) > 0:
-            v1 = v1 / np.linalg.norm(v1)
-            v2 = v2 / np.linalg.norm(v2)
+        v1_x, v1_y = n1.x - center_x, n1.y - center_y
+        v2_x, v2_y = n2.x - center_x, n2.y - center_y
+        len1 = math.hypot(v1_x, v1_y)
+        len2 = math.hypot(v2_x, v2_y)
+        
+        if len1 > 0 and len2 > 0:
+            v1_x, v1_y = v1_x / len1, v1_y / len1
+            v2_x, v2_y = v2_x / len2, v2_y / len2
             
             # Rotate vectors slightly away from each other
-            rotation_angle = self.min_angle / 4
+            cos_a, sin_a = self._rot_cos, self._rot_sin
             
             # Rotate v1 clockwise
-            cos_a, sin_a = math.cos(-rotation_angle), math.sin(-rotation_angle)
-            v1_rot = np.array([v1[0] * cos_a - v1[1] * sin_a,
-                              v1[0] * sin_a + v1[1] * cos_a])
+            v1_rot_x = v1_x * cos_a + v1_y * sin_a
+            v1_rot_y = -v1_x * sin_a + v1_y * cos_a
             
             # Rotate v2 counter-clockwise
-            cos_a, sin_a = math.cos(rotation_angle), math.sin(rotation_angle)
-            v2_rot = np.array([v2[0] * cos_a - v2[1] * sin_a,
-                              v2[0] * sin_a + v2[1] * cos_a])
+            v2_rot_x = v2_x * cos_a - v2_y * sin_a
+            v2_rot_y = v2_x * sin_a + v2_y * cos_a
             
             # Update positions
-            avg_dist = (np.linalg.norm([n1.x - center.x, n1.y - center.y]) + 
-                       np.linalg.norm([n2.x - center.x, n2.y - center.y])) / 2
+            avg_dist = (len1 + len2) / 2
             
-            n1.update_position(center.x + v1_rot[0] * avg_dist,
-                              center.y + v1_rot[1] * avg_dist)
-            n2.update_position(center.x + v2_rot[0] * avg_dist,
-                              center.y + v2_rot[1] * avg_dist)
+            n1.update_position(center_x + v1_rot_x * avg_dist,
+                              center_y + v1_rot_y * avg_dist)
+            n2.update_position(center_x + v2_rot_x * avg_dist,
+                              center_y + v2_rot_y * avg_dist)
+            graph.mark_changed()
     
     def _adjust_for_convexity(self, graph: PlanarGraph, prev_id: int, 
                              curr_id: int, next_id: int):
@@ -289,41 +421,34 @@ class GeometryEngine:
         center = self._calculate_graph_center(graph)
         
         # Direction from center to current vertex
-        to_curr = np.array([curr_vertex.x - center[0], curr_vertex.y - center[1]])
+        to_curr_x = curr_vertex.x - center[0]
+        to_curr_y = curr_vertex.y - center[1]
+        length = math.hypot(to_curr_x, to_curr_y)
         
-        if np.linalg.norm(to_curr) > 0:
-            to_curr = to_curr / np.linalg.norm(to_curr)
-            
+        if length > 0:
             # Move vertex outward by a small amount
             adjustment = 10  # pixels
-            new_x = curr_vertex.x + to_curr[0] * adjustment
-            new_y = curr_vertex.y + to_curr[1] * adjustment
+            new_x = curr_vertex.x + to_curr_x / length * adjustment
+            new_y = curr_vertex.y + to_curr_y / length * adjustment
             
             curr_vertex.update_position(new_x, new_y)
+            graph.mark_changed()
     
     def _update_vertex_diameters(self, graph: PlanarGraph):
         """Update vertex diameters based on current indices"""
-        for vertex in graph.vertices.values():
-            vertex.diameter = vertex._calculate_diameter()
+        graph.refresh_diameters()
     
     def scale_graph(self, graph: PlanarGraph, scale_factor: float, center: Tuple[float, float]):
         """Scale the entire graph around a center point"""
-        for vertex in graph.vertices.values():
-            # Translate to origin relative to center
-            rel_x = vertex.x - center[0]
-            rel_y = vertex.y - center[1]
-            
-            # Scale
-            rel_x *= scale_factor
-            rel_y *= scale_factor
-            
-            # Translate back
-            vertex.update_position(center[0] + rel_x, center[1] + rel_y)
+        xs, ys, _, _ = self._sync_arrays(graph)
+        self._write_positions(graph,
+                              (xs - center[0]) * scale_factor + center[0],
+                              (ys - center[1]) * scale_factor + center[1])
     
     def translate_graph(self, graph: PlanarGraph, dx: float, dy: float):
         """Translate the entire graph by the given offset"""
-        for vertex in graph.vertices.values():
-            vertex.update_position(vertex.x + dx, vertex.y + dy)
+        xs, ys, _, _ = self._sync_arrays(graph)
+        self._write_positions(graph, xs + dx, ys + dy)
     
     def center_graph_in_bounds(self, graph: PlanarGraph, bounds: Tuple[float, float, float, float]):
         """Center the graph within the given bounds (x_min, y_min, x_max, y_max)"""
@@ -331,10 +456,9 @@ class GeometryEngine:
             return
         
         # Calculate current bounding box
-        min_x = min(v.x for v in graph.vertices.values())
-        max_x = max(v.x for v in graph.vertices.values())
-        min_y = min(v.y for v in graph.vertices.values())
-        max_y = max(v.y for v in graph.vertices.values())
+        xs, ys, _, _ = self._sync_arrays(graph)
+        min_x, max_x = float(xs.min()), float(xs.max())
+        min_y, max_y = float(ys.min()), float(ys.max())
         
         # Calculate current center
         curr_center_x = (min_x + max_x) / 2
@@ -358,21 +482,9 @@ class GeometryEngine:
             scale_x = (bounds_width * padding_factor) / graph_width
             scale_y = (bounds_height * padding_factor) / graph_height
             scale_factor = min(scale_x, scale_y)
-            
-            # Apply scaling first (around current center)
-            self.scale_graph(graph, scale_factor, (curr_center_x, curr_center_y))
-        
-        # Recalculate center after scaling
-        min_x = min(v.x for v in graph.vertices.values())
-        max_x = max(v.x for v in graph.vertices.values())
-        min_y = min(v.y for v in graph.vertices.values())
-        max_y = max(v.y for v in graph.vertices.values())
-        
-        curr_center_x = (min_x + max_x) / 2
-        curr_center_y = (min_y + max_y) / 2
-        
-        # Translate to center
-        dx = target_center_x - curr_center_x
-        dy = target_center_y - curr_center_y
         
-        self.translate_graph(graph, dx, dy)
+        # Scaling around the bounding box center keeps that center in place, so
+        # scale and translate to the target compose into one affine pass
+        self._write_positions(graph,
+                              (xs - curr_center_x) * scale_factor + target_center_x,
+                              (ys - curr_center_y) * scale_factor + target_center_y)
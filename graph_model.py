@@ -1,22 +1,33 @@
 import numpy as np
-from typing import Dict, List, Set, Tuple, Optional
+import math
+import uuid
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional
 import json
+from settings import PERFORMANCE_SETTINGS
+
+# Unit directions of the initial triangle's corners, at 0, 120 and 240 degrees
+_TRIANGLE_DIRECTIONS = tuple(
+    (math.cos(i * 2 * math.pi / 3), math.sin(i * 2 * math.pi / 3)) for i in range(3)
+)
 
 class Vertex:
     """Represents a vertex in the planar graph"""
     
+    __slots__ = ('id', 'x', 'y', 'color_index', 'label', 'diameter')
+    
     def __init__(self, vertex_id: int, x: float, y: float, color_index: int = 1):
         self.id = vertex_id
         self.x = x
         self.y = y
         self.color_index = color_index  # 1-4 for color palette
+        self.label = str(vertex_id)  # Index label, fixed for the vertex's lifetime
         self.diameter = self._calculate_diameter()
         
     def _calculate_diameter(self) -> float:
         """Calculate vertex diameter based on label size"""
         # Base diameter + scaling factor for larger indices
         base_diameter = 30
-        label_length = len(str(self.id))
+        label_length = len(self.label)
         return base_diameter + (label_length - 1) * 5
     
     def update_position(self, x: float, y: float):
@@ -26,7 +37,7 @@ class Vertex:
     
     def distance_to(self, other: 'Vertex') -> float:
         """Calculate Euclidean distance to another vertex"""
-        return np.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
+        return math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
     
     def to_dict(self) -> Dict:
         """Convert vertex to dictionary for serialization"""
@@ -48,16 +59,25 @@ class Vertex:
 class Edge:
     """Represents an edge in the planar graph"""
     
+    __slots__ = ('v1_id', 'v2_id', 'key')
+    
     def __init__(self, v1_id: int, v2_id: int):
-        self.v1_id = min(v1_id, v2_id)  # Ensure consistent ordering
-        self.v2_id = max(v1_id, v2_id)
-        self.id = f"{self.v1_id}-{self.v2_id}"
+        if v1_id > v2_id:  # Ensure consistent ordering
+            v1_id, v2_id = v2_id, v1_id
+        self.v1_id = v1_id
+        self.v2_id = v2_id
+        self.key = (v1_id << 32) | v2_id  # Packed endpoints, used for hashing and equality
+    
+    @property
+    def id(self) -> str:
+        """Readable edge identifier, e.g. '3-7'"""
+        return f"{self.v1_id}-{self.v2_id}"
     
     def __eq__(self, other):
-        return isinstance(other, Edge) and self.id == other.id
+        return isinstance(other, Edge) and self.key == other.key
     
     def __hash__(self):
-        return hash(self.id)
+        return self.key
     
     def contains_vertex(self, vertex_id: int) -> bool:
         """Check if edge contains the given vertex"""
@@ -94,7 +114,60 @@ class PlanarGraph:
         self.edges: Set[Edge] = set()
         self.adjacency: Dict[int, Set[int]] = {}
         self.periphery: List[int] = []  # Ordered list of periphery vertex IDs
+        self._periphery_pos: Dict[int, int] = {}  # Vertex ID -> index in periphery
+        self._hull_version = -1  # Graph version right after the last hull computation
         self.next_vertex_id = 1
+        self.version = 0  # Bumped on every mutation, used as a cache key
+        self.token = uuid.uuid4().hex  # Identifies this graph in caches shared across sessions
+        self.topology_version = 0  # Bumped only when vertices or edges are added/removed
+        self._edge_arrays_version = -1
+        self._edge_arrays_cache: Tuple[np.ndarray, ...] = (None, None, None, None)
+        self._edge_rows_version = -1
+        self._edge_rows_cache: Tuple[np.ndarray, np.ndarray] = (None, None)
+        self._csr_version = -1
+        self._csr_cache: Tuple[np.ndarray, np.ndarray] = (None, None)
+        self._connected_version = -1
+        self._connected = True
+        self._dirty_diameters: Set[int] = set()  # Loaded vertices whose diameter is not yet recomputed
+        self._derived: Dict[str, Tuple[int, object]] = {}  # name -> (version, value)
+        self._grid_key: Optional[Tuple[int, float]] = None
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+    
+    def mark_changed(self, topology: bool = False):
+        """Record that vertices, edges or positions have changed"""
+        self.version += 1
+        if topology:
+            self.topology_version += 1
+    
+    def cached(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Return compute(), memoised under name until the graph version changes"""
+        entry = self._derived.get(name)
+        if entry is None or entry[0] != self.version:
+            entry = (self.version, compute())
+            self._derived[name] = entry
+        return entry[1]
+    
+    def _set_periphery(self, periphery: List[int]):
+        """Replace the periphery, keeping the membership set in sync"""
+        self.periphery = periphery
+        self._periphery_pos = {vid: i for i, vid in enumerate(periphery)}
+        self.mark_changed()
+    
+    def refresh_diameters(self):
+        """Recompute the diameters of loaded vertices that are not yet up to date"""
+        # Vertices created by add_vertex get their diameter in Vertex.__init__ and
+        # the ID never changes, so only loaded vertices can be out of date
+        while self._dirty_diameters:
+            vertex = self.vertices[self._dirty_diameters.pop()]
+            vertex.diameter = vertex._calculate_diameter()
+    
+    def contains_periphery(self, vertex_id: int) -> bool:
+        """Check if a vertex is on the periphery"""
+        return vertex_id in self._periphery_pos
+    
+    def periphery_position(self, vertex_id: int) -> Optional[int]:
+        """Get the index of a vertex in the periphery, or None if it is not on it"""
+        return self._periphery_pos.get(vertex_id)
         
     def add_vertex(self, x: float, y: float, color_index: int = 1) -> int:
         """Add a new vertex to the graph"""
@@ -104,6 +177,7 @@ class PlanarGraph:
         vertex = Vertex(vertex_id, x, y, color_index)
         self.vertices[vertex_id] = vertex
         self.adjacency[vertex_id] = set()
+        self.mark_changed(topology=True)
         
         return vertex_id
     
@@ -115,16 +189,15 @@ class PlanarGraph:
         if v1_id == v2_id:
             return False  # No self-loops
         
-        edge = Edge(v1_id, v2_id)
-        
         # Check if edge already exists
-        if edge in self.edges:
+        if v2_id in self.adjacency[v1_id]:
             return False
         
         # Add edge and update adjacency
-        self.edges.add(edge)
+        self.edges.add(Edge(v1_id, v2_id))
         self.adjacency[v1_id].add(v2_id)
         self.adjacency[v2_id].add(v1_id)
+        self.mark_changed(topology=True)
         
         return True
     
@@ -133,22 +206,25 @@ class PlanarGraph:
         if vertex_id not in self.vertices:
             return
         
-        # Remove all edges connected to this vertex
-        edges_to_remove = [edge for edge in self.edges if edge.contains_vertex(vertex_id)]
-        for edge in edges_to_remove:
-            self.edges.remove(edge)
-        
-        # Update adjacency lists
+        # Remove the vertex's edges and back-references, found through its
+        # adjacency rather than by scanning every edge
         for neighbor_id in self.adjacency[vertex_id]:
+            self.edges.discard(Edge(vertex_id, neighbor_id))
             self.adjacency[neighbor_id].discard(vertex_id)
         
         # Remove vertex
         del self.vertices[vertex_id]
         del self.adjacency[vertex_id]
+        self._dirty_diameters.discard(vertex_id)
         
-        # Update periphery
-        if vertex_id in self.periphery:
-            self.periphery.remove(vertex_id)
+        # Update periphery, deleting by stored index; only later positions shift
+        idx = self._periphery_pos.pop(vertex_id, None)
+        if idx is not None:
+            del self.periphery[idx]
+            for i in range(idx, len(self.periphery)):
+                self._periphery_pos[self.periphery[i]] = i
+        
+        self.mark_changed(topology=True)
     
     def get_neighbors(self, vertex_id: int) -> Set[int]:
         """Get all neighbors of a vertex"""
@@ -156,27 +232,39 @@ class PlanarGraph:
     
     def is_edge(self, v1_id: int, v2_id: int) -> bool:
         """Check if an edge exists between two vertices"""
-        return Edge(v1_id, v2_id) in self.edges
+        # Adjacency mirrors the edge set, so no Edge needs to be built for the query
+        return v2_id in self.adjacency.get(v1_id, ())
     
     def update_periphery(self):
         """Update the periphery vertices in clockwise order"""
+        # Nothing has moved or been added/removed since the hull was last computed
+        if PERFORMANCE_SETTINGS['lazy_periphery_update'] and self._hull_version == self.version:
+            return
+        
         if len(self.vertices) < 3:
-            self.periphery = list(self.vertices.keys())
+            self._set_periphery(list(self.vertices.keys()))
             return
         
         # Find the periphery by identifying vertices on the convex hull
-        vertices_list = [(v.x, v.y, v.id) for v in self.vertices.values()]
-        
-        if len(vertices_list) < 3:
-            self.periphery = [v[2] for v in vertices_list]
-            return
+        xs, ys, _, _ = self.edge_arrays()
+        ids = np.fromiter((v.id for v in self.vertices.values()), dtype=np.int64, count=len(xs))
+        
+        # Akl-Toussaint filter: points strictly inside the quadrilateral spanned by
+        # the leftmost, lowest, rightmost and highest points cannot be on the hull
+        corners = [int(xs.argmin()), int(ys.argmin()), int(xs.argmax()), int(ys.argmax())]
+        inside = np.ones(len(xs), dtype=bool)
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            inside &= (xs[b] - xs[a]) * (ys - ys[a]) - (ys[b] - ys[a]) * (xs - xs[a]) > 0
+        keep = ~inside
+        xs, ys, ids = xs[keep], ys[keep], ids[keep]
         
         # Compute convex hull using Graham scan
         def cross_product(o, a, b):
             return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
         
         # Sort points lexicographically
-        vertices_list.sort()
+        order = np.lexsort((ids, ys, xs))
+        vertices_list = list(zip(xs[order].tolist(), ys[order].tolist(), ids[order].tolist()))
         
         # Build lower hull
         lower = []
@@ -196,16 +284,16 @@ class PlanarGraph:
         hull = lower[:-1] + upper[:-1]
         
         # Extract vertex IDs in clockwise order
-        self.periphery = [p[2] for p in hull]
+        self._set_periphery([p[2] for p in hull])
+        self._hull_version = self.version
     
     def get_periphery_segment(self, start_id: int, end_id: int) -> List[int]:
         """Get vertices between start_id and end_id on periphery (clockwise)"""
-        if start_id not in self.periphery or end_id not in self.periphery:
+        start_idx = self._periphery_pos.get(start_id)
+        end_idx = self._periphery_pos.get(end_id)
+        if start_idx is None or end_idx is None:
             return []
         
-        start_idx = self.periphery.index(start_id)
-        end_idx = self.periphery.index(end_id)
-        
         if start_idx <= end_idx:
             return self.periphery[start_idx:end_idx + 1]
         else:
@@ -217,19 +305,109 @@ class PlanarGraph:
         # A full planarity test would require more complex algorithms
         return True
     
+    def is_connected(self) -> bool:
+        """Check if every vertex can be reached from every other one"""
+        # Connectivity depends only on vertices and edges, so reruns and moves reuse it
+        if self._connected_version != self.topology_version:
+            self._connected = self._compute_connected()
+            self._connected_version = self.topology_version
+        return self._connected
+    
+    def _compute_connected(self) -> bool:
+        """Label connected components and check that there is only one"""
+        n = len(self.vertices)
+        if n <= 1:
+            return True
+        
+        # A connected graph needs at least a spanning tree's worth of edges
+        if len(self.edges) < n - 1:
+            return False
+        
+        # Connected components by min-label hooking with pointer jumping: each
+        # round hooks every root onto the smallest root across its edges, then
+        # flattens the trees, so labels settle in a few vectorised rounds
+        _, _, e_v1, e_v2 = self.edge_arrays()
+        labels = np.arange(n)
+        while True:
+            l1, l2 = labels[e_v1], labels[e_v2]
+            lowest = np.minimum(l1, l2)
+            hooked = labels.copy()
+            np.minimum.at(hooked, l1, lowest)
+            np.minimum.at(hooked, l2, lowest)
+            while True:
+                jumped = hooked[hooked]
+                if np.array_equal(jumped, hooked):
+                    break
+                hooked = jumped
+            if np.array_equal(hooked, labels):
+                break
+            labels = hooked
+        
+        return bool((labels == labels[0]).all())
+    
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vertex coordinates as contiguous xs/ys arrays and edge endpoints as
+        e_v1/e_v2 row indices into them. Coordinates are rebuilt when the graph
+        version changes, edge rows only when the topology changes. The arrays
+        are shared by every caller, so copy them before modifying
+        """
+        if self._edge_arrays_version != self.version:
+            n = len(self.vertices)
+            xs = np.fromiter((v.x for v in self.vertices.values()), dtype=np.float64, count=n)
+            ys = np.fromiter((v.y for v in self.vertices.values()), dtype=np.float64, count=n)
+            
+            if self._edge_rows_version != self.topology_version:
+                row = {vid: i for i, vid in enumerate(self.vertices)}
+                e_v1 = np.fromiter((row[e.v1_id] for e in self.edges), dtype=np.int32, count=len(self.edges))
+                e_v2 = np.fromiter((row[e.v2_id] for e in self.edges), dtype=np.int32, count=len(self.edges))
+                self._edge_rows_cache = (e_v1, e_v2)
+                self._edge_rows_version = self.topology_version
+            
+            self._edge_arrays_cache = (xs, ys) + self._edge_rows_cache
+            self._edge_arrays_version = self.version
+        return self._edge_arrays_cache
+    
+    def adjacency_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Adjacency in CSR form over the same rows as edge_arrays: the neighbours
+        of row i are nbrs[off[i]:off[i + 1]]. Rebuilt only when the topology changes;
+        the arrays are shared, so copy them before modifying
+        """
+        if self._csr_version != self.topology_version:
+            _, _, e_v1, e_v2 = self.edge_arrays()
+            rows = np.concatenate((e_v1, e_v2))
+            cols = np.concatenate((e_v2, e_v1))
+            order = np.argsort(rows, kind='stable')
+            off = np.zeros(len(self.vertices) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=len(self.vertices)), out=off[1:])
+            self._csr_cache = (off, cols[order].astype(np.int64))
+            self._csr_version = self.topology_version
+        return self._csr_cache
+    
+    def spatial_grid(self, cell_size: float) -> Dict[Tuple[int, int], List[int]]:
+        """
+        Vertex rows (as in edge_arrays) bucketed into square cells of cell_size,
+        in row order, rebuilt only when the graph version or cell size changes
+        """
+        if self._grid_key != (self.version, cell_size):
+            xs, ys, _, _ = self.edge_arrays()
+            cells_x = np.floor_divide(xs, cell_size).astype(np.int64).tolist()
+            cells_y = np.floor_divide(ys, cell_size).astype(np.int64).tolist()
+            grid: Dict[Tuple[int, int], List[int]] = {}
+            for row, cell in enumerate(zip(cells_x, cells_y)):
+                grid.setdefault(cell, []).append(row)
+            self._grid = grid
+            self._grid_key = (self.version, cell_size)
+        return self._grid
+    
     def get_edge_length_stats(self) -> Dict[str, float]:
         """Get statistics about edge lengths"""
-        lengths = []
-        for edge in self.edges:
-            v1 = self.vertices[edge.v1_id]
-            v2 = self.vertices[edge.v2_id]
-            length = v1.distance_to(v2)
-            lengths.append(length)
-        
-        if not lengths:
+        if not self.edges:
             return {'mean': 0, 'std': 0, 'min': 0, 'max': 0}
         
-        lengths = np.array(lengths)
+        xs, ys, e_v1, e_v2 = self.edge_arrays()
+        lengths = np.hypot(xs[e_v2] - xs[e_v1], ys[e_v2] - ys[e_v1])
         return {
             'mean': float(np.mean(lengths)),
             'std': float(np.std(lengths)),
@@ -245,11 +423,8 @@ class PlanarGraph:
         center_x, center_y = 400, 300
         radius = 100
         
-        for i in range(3):
-            angle = i * 2 * np.pi / 3
-            x = center_x + radius * np.cos(angle)
-            y = center_y + radius * np.sin(angle)
-            vertex_id = self.add_vertex(x, y, 1)
+        for cos_a, sin_a in _TRIANGLE_DIRECTIONS:
+            self.add_vertex(center_x + radius * cos_a, center_y + radius * sin_a, 1)
         
         # Add edges to form triangle
         self.add_edge(1, 2)
@@ -265,35 +440,63 @@ class PlanarGraph:
         self.edges.clear()
         self.adjacency.clear()
         self.periphery.clear()
+        self._periphery_pos.clear()
+        self._dirty_diameters.clear()
         self.next_vertex_id = 1
+        self.mark_changed(topology=True)
     
     def to_dict(self) -> Dict:
-        """Convert graph to dictionary for serialization"""
+        """Convert graph to dictionary for serialization, with vertices and edges as columns"""
+        xs, ys, e_v1, e_v2 = self.edge_arrays()
+        ids = np.fromiter(self.vertices, dtype=np.int64, count=len(self.vertices))
         return {
-            'vertices': {vid: v.to_dict() for vid, v in self.vertices.items()},
-            'edges': [e.to_dict() for e in self.edges],
+            'vertices': {
+                'id': ids.tolist(),
+                'x': xs.tolist(),
+                'y': ys.tolist(),
+                'color_index': [v.color_index for v in self.vertices.values()],
+                'diameter': [v.diameter for v in self.vertices.values()]
+            },
+            'edges': {
+                'v1_id': ids[e_v1].tolist(),
+                'v2_id': ids[e_v2].tolist()
+            },
             'periphery': self.periphery,
             'next_vertex_id': self.next_vertex_id
         }
     
     def from_dict(self, data: Dict):
-        """Load graph from dictionary"""
+        """Load graph from dictionary, in either the columnar or the per-vertex format"""
         self.clear()
         
         # Load vertices
-        for vid_str, vertex_data in data['vertices'].items():
-            vid = int(vid_str)
-            vertex = Vertex.from_dict(vertex_data)
-            self.vertices[vid] = vertex
+        vertex_data = data['vertices']
+        if 'id' in vertex_data:
+            columns = zip(vertex_data['id'], vertex_data['x'], vertex_data['y'],
+                          vertex_data['color_index'], vertex_data['diameter'])
+            for vid, x, y, color_index, diameter in columns:
+                vertex = Vertex(vid, x, y, color_index)
+                vertex.diameter = diameter
+                self.vertices[vid] = vertex
+        else:
+            for vid_str, fields in vertex_data.items():
+                self.vertices[int(vid_str)] = Vertex.from_dict(fields)
+        for vid in self.vertices:
             self.adjacency[vid] = set()
+            self._dirty_diameters.add(vid)
         
         # Load edges
-        for edge_data in data['edges']:
-            edge = Edge.from_dict(edge_data)
+        edge_data = data['edges']
+        if isinstance(edge_data, dict):
+            edges = map(Edge, edge_data['v1_id'], edge_data['v2_id'])
+        else:
+            edges = map(Edge.from_dict, edge_data)
+        for edge in edges:
             self.edges.add(edge)
             self.adjacency[edge.v1_id].add(edge.v2_id)
             self.adjacency[edge.v2_id].add(edge.v1_id)
         
         # Load periphery and next ID
-        self.periphery = data.get('periphery', [])
+        self._set_periphery(data.get('periphery', []))
         self.next_vertex_id = data.get('next_vertex_id', len(self.vertices) + 1)
+        self.mark_changed(topology=True)
@@ -1,10 +1,90 @@
 import streamlit as st
 import numpy as np
+from itertools import compress
 from streamlit_drawable_canvas import st_canvas
 from typing import Dict, List, Tuple, Optional
 from graph_model import PlanarGraph
 from settings import COLORS
 
+@st.cache_data(max_entries=8, hash_funcs={PlanarGraph: lambda g: (g.token, g.version)})
+def _cached_drawing_data(_renderer: 'GraphRenderer', graph: PlanarGraph,
+                         canvas_size: Tuple[int, int], zoom_level: float,
+                         pan_offset: Tuple[float, float], view_mode: str,
+                         hidden_threshold: Optional[int]) -> Dict:
+    """
+    Drawing data keyed on the graph version and every view parameter, so
+    reruns that don't change the picture skip rebuilding it
+    """
+    return _renderer._prepare_drawing_data(
+        graph, list(canvas_size), zoom_level, list(pan_offset), view_mode, hidden_threshold
+    )
+
+# Fabric.js properties shared by every object of a kind; the per-object fields
+# (position, size, colour, text) are filled in by _prepare_drawing_data
+_FABRIC_COMMON = {
+    "version": "4.4.0",
+    "strokeDashArray": None,
+    "strokeLineCap": "butt",
+    "strokeDashOffset": 0,
+    "strokeLineJoin": "miter",
+    "strokeUniform": False,
+    "strokeMiterLimit": 4,
+    "scaleX": 1,
+    "scaleY": 1,
+    "angle": 0,
+    "flipX": False,
+    "flipY": False,
+    "opacity": 1,
+    "shadow": None,
+    "visible": True,
+    "backgroundColor": ""
+}
+
+_LINE_TEMPLATE = {
+    **_FABRIC_COMMON,
+    "type": "line",
+    "originX": "left",
+    "originY": "top",
+    "fill": "",
+    "strokeWidth": 2
+}
+
+_CIRCLE_TEMPLATE = {
+    **_FABRIC_COMMON,
+    "type": "circle",
+    "originX": "center",
+    "originY": "center",
+    "strokeWidth": 2,
+    "startAngle": 0,
+    "endAngle": 6.283185307179586
+}
+
+_TEXT_TEMPLATE = {
+    **_FABRIC_COMMON,
+    "type": "text",
+    "originX": "center",
+    "originY": "center",
+    "width": 100,
+    "height": 50,
+    "fill": "#000000",
+    "stroke": None,
+    "strokeWidth": 1,
+    "fontWeight": "bold",
+    "fontFamily": "Arial",
+    "fontStyle": "normal",
+    "lineHeight": 1.16,
+    "underline": False,
+    "overline": False,
+    "linethrough": False,
+    "textAlign": "center",
+    "textBackgroundColor": "",
+    "charSpacing": 0
+}
+
+# Label font size by whole vertex radius: half the radius, clamped to 12-20 px;
+# every radius of 40 or more maps to the last entry
+_LABEL_FONT_SIZES = tuple(max(12, min(20, r // 2)) for r in range(41))
+
 class GraphRenderer:
     """
     Handles rendering of the planar graph using Streamlit components
@@ -13,6 +93,9 @@ class GraphRenderer:
     def __init__(self):
         self.default_canvas_size = [1400, 800]  # Larger default for full screen
         self.vertex_colors = COLORS['vertex_colors']
+        # Fill colour indexed by color_index; gaps fall back to the first colour
+        self._color_lut = tuple(self.vertex_colors.get(i, self.vertex_colors[1])
+                                for i in range(max(self.vertex_colors) + 1))
         self.edge_color = COLORS['edge_color']
         self.background_color = COLORS['background_color']
         
@@ -22,9 +105,10 @@ class GraphRenderer:
         """
         Render the graph on an interactive canvas
         """
-        # Prepare drawing commands for the canvas
-        drawing_data = self._prepare_drawing_data(
-            graph, canvas_size, zoom_level, pan_offset, view_mode, hidden_threshold
+        # Prepare drawing commands for the canvas (lists are unhashable)
+        drawing_data = _cached_drawing_data(
+            self, graph, tuple(canvas_size), zoom_level, tuple(pan_offset),
+            view_mode, hidden_threshold
         )
         
         # Create the canvas
@@ -54,166 +138,85 @@ class GraphRenderer:
         """
         objects = []
         
-        # Transform coordinates based on zoom and pan
-        def transform_coords(x, y):
-            # Apply zoom
-            tx = x * zoom_level
-            ty = y * zoom_level
-            
-            # Apply pan offset
-            tx += pan_offset[0]
-            ty += pan_offset[1]
-            
-            # Center in canvas
-            tx += canvas_size[0] / 2
-            ty += canvas_size[1] / 2
-            
-            return tx, ty
+        # Transform every coordinate at once: zoom, then pan, then centre in canvas
+        xs, ys, e_v1, e_v2 = graph.edge_arrays()
+        txs = xs * zoom_level + pan_offset[0] + canvas_size[0] / 2
+        tys = ys * zoom_level + pan_offset[1] + canvas_size[1] / 2
+        color_lut = self._color_lut
+        
+        # Drop hidden vertices and every edge touching one with a single mask each
+        vertex_items = zip(graph.vertices.items(), txs.tolist(), tys.tolist())
+        if hidden_threshold is not None:
+            visible = np.fromiter(graph.vertices, dtype=np.int64, count=len(graph.vertices)) <= hidden_threshold
+            keep = visible[e_v1] & visible[e_v2]
+            e_v1, e_v2 = e_v1[keep], e_v2[keep]
+            vertex_items = compress(vertex_items, visible.tolist())
+        
+        # Edge bounding boxes and endpoint offsets within them
+        ex1, ex2 = txs[e_v1], txs[e_v2]
+        ey1, ey2 = tys[e_v1], tys[e_v2]
+        widths = np.abs(ex2 - ex1)
+        heights = np.abs(ey2 - ey1)
+        x_forward = ex1 <= ex2
+        y_forward = ey1 <= ey2
+        edge_columns = zip(
+            np.minimum(ex1, ex2).tolist(), np.minimum(ey1, ey2).tolist(),
+            widths.tolist(), heights.tolist(),
+            np.where(x_forward, 0, widths).tolist(), np.where(y_forward, 0, heights).tolist(),
+            np.where(x_forward, widths, 0).tolist(), np.where(y_forward, heights, 0).tolist()
+        )
         
         # Draw edges first (so they appear behind vertices)
-        for edge in graph.edges:
-            v1 = graph.vertices[edge.v1_id]
-            v2 = graph.vertices[edge.v2_id]
-            
-            # Check if vertices should be hidden
-            if hidden_threshold is not None:
-                if v1.id > hidden_threshold or v2.id > hidden_threshold:
-                    continue
-            
-            x1, y1 = transform_coords(v1.x, v1.y)
-            x2, y2 = transform_coords(v2.x, v2.y)
-            
+        for left, top, width, height, x1, y1, x2, y2 in edge_columns:
             # Create edge object
-            edge_obj = {
-                "type": "line",
-                "version": "4.4.0",
-                "originX": "left",
-                "originY": "top",
-                "left": min(x1, x2),
-                "top": min(y1, y2),
-                "width": abs(x2 - x1),
-                "height": abs(y2 - y1),
-                "fill": "",
+            objects.append({
+                **_LINE_TEMPLATE,
+                "left": left,
+                "top": top,
+                "width": width,
+                "height": height,
                 "stroke": self.edge_color,
-                "strokeWidth": 2,
-                "strokeDashArray": None,
-                "strokeLineCap": "butt",
-                "strokeDashOffset": 0,
-                "strokeLineJoin": "miter",
-                "strokeUniform": False,
-                "strokeMiterLimit": 4,
-                "scaleX": 1,
-                "scaleY": 1,
-                "angle": 0,
-                "flipX": False,
-                "flipY": False,
-                "opacity": 1,
-                "shadow": None,
-                "visible": True,
-                "backgroundColor": "",
-                "x1": 0 if x1 <= x2 else abs(x2 - x1),
-                "y1": 0 if y1 <= y2 else abs(y2 - y1),
-                "x2": abs(x2 - x1) if x1 <= x2 else 0,
-                "y2": abs(y2 - y1) if y1 <= y2 else 0
-            }
-            objects.append(edge_obj)
+                "x1": x1,
+                "y1": y1,
+                "x2": x2,
+                "y2": y2
+            })
         
         # Draw vertices
-        for vertex_id, vertex in graph.vertices.items():
-            # Check if vertex should be hidden
-            if hidden_threshold is not None and vertex_id > hidden_threshold:
-                continue
-            
-            x, y = transform_coords(vertex.x, vertex.y)
+        for (vertex_id, vertex), x, y in vertex_items:
             radius = vertex.diameter / 2 * zoom_level
             
             # Get vertex color based on view mode
-            if view_mode == 'color':
-                fill_color = self.vertex_colors.get(vertex.color_index, self.vertex_colors[1])
+            if view_mode == 'color' and 0 <= vertex.color_index < len(color_lut):
+                fill_color = color_lut[vertex.color_index]
             else:
-                # Use a default color for index mode
+                # Use a default color for index mode and unknown color indices
                 fill_color = self.vertex_colors[1]
             
             # Create vertex circle object
-            vertex_obj = {
-                "type": "circle",
-                "version": "4.4.0",
-                "originX": "center",
-                "originY": "center",
+            objects.append({
+                **_CIRCLE_TEMPLATE,
                 "left": x,
                 "top": y,
                 "width": radius * 2,
                 "height": radius * 2,
                 "fill": fill_color,
                 "stroke": self.vertex_colors[1],  # Outline color
-                "strokeWidth": 2,
-                "strokeDashArray": None,
-                "strokeLineCap": "butt",
-                "strokeDashOffset": 0,
-                "strokeLineJoin": "miter",
-                "strokeUniform": False,
-                "strokeMiterLimit": 4,
-                "scaleX": 1,
-                "scaleY": 1,
-                "angle": 0,
-                "flipX": False,
-                "flipY": False,
-                "opacity": 1,
-                "shadow": None,
-                "visible": True,
-                "backgroundColor": "",
                 "radius": radius,
-                "startAngle": 0,
-                "endAngle": 6.283185307179586,
                 "vertex_id": vertex_id  # Custom property for identification
-            }
-            objects.append(vertex_obj)
+            })
             
             # Add vertex label
-            label_text = str(vertex_id) if view_mode == 'index' else str(vertex.color_index)
+            label_text = vertex.label if view_mode == 'index' else str(vertex.color_index)
             
-            label_obj = {
-                "type": "text",
-                "version": "4.4.0",
-                "originX": "center",
-                "originY": "center",
+            objects.append({
+                **_TEXT_TEMPLATE,
                 "left": x,
                 "top": y,
-                "width": 100,
-                "height": 50,
-                "fill": "#000000",
-                "stroke": None,
-                "strokeWidth": 1,
-                "strokeDashArray": None,
-                "strokeLineCap": "butt",
-                "strokeDashOffset": 0,
-                "strokeLineJoin": "miter",
-                "strokeUniform": False,
-                "strokeMiterLimit": 4,
-                "scaleX": 1,
-                "scaleY": 1,
-                "angle": 0,
-                "flipX": False,
-                "flipY": False,
-                "opacity": 1,
-                "shadow": None,
-                "visible": True,
-                "backgroundColor": "",
                 "text": label_text,
-                "fontSize": max(12, min(20, int(radius / 2))),
-                "fontWeight": "bold",
-                "fontFamily": "Arial",
-                "fontStyle": "normal",
-                "lineHeight": 1.16,
-                "underline": False,
-                "overline": False,
-                "linethrough": False,
-                "textAlign": "center",
-                "textBackgroundColor": "",
-                "charSpacing": 0,
+                "fontSize": _LABEL_FONT_SIZES[min(int(radius), 40)],
                 "styles": {}
-            }
-            objects.append(label_obj)
+            })
         
         return {
             "version": "4.4.0",
@@ -287,9 +290,9 @@ class GraphRenderer:
             st.text(neighbors_str)
         
         # Show if vertex is on periphery
-        if vertex_id in graph.periphery:
+        periphery_index = graph.periphery_position(vertex_id)
+        if periphery_index is not None:
             st.success("This vertex is on the periphery")
-            periphery_index = graph.periphery.index(vertex_id)
             st.text(f"Periphery position: {periphery_index}")
         else:
             st.info("This vertex is not on the periphery")
@@ -366,20 +369,6 @@ class GraphRenderer:
     
     def _is_graph_connected(self, graph: PlanarGraph) -> bool:
         """
-        Check if the graph is connected using DFS
+        Check if the graph is connected
         """
-        if not graph.vertices:
-            return True
-        
-        visited = set()
-        start_vertex = next(iter(graph.vertices.keys()))
-        stack = [start_vertex]
-        
-        while stack:
-            vertex_id = stack.pop()
-            if vertex_id not in visited:
-                visited.add(vertex_id)
-                neighbors = graph.get_neighbors(vertex_id)
-                stack.extend(n for n in neighbors if n not in visited)
-        
-        return len(visited) == len(graph.vertices)
+        return graph.is_connected()
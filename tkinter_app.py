@@ -5,15 +5,26 @@ Interactive graph visualization with computational geometry constraints
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import math
-import json
-import random
+from tkinter import ttk, messagebox
+import numpy as np
 from typing import Dict, List, Tuple, Optional, Set
 from graph_model import PlanarGraph, Vertex, Edge
 from geometry import GeometryEngine
 from commands import CommandProcessor
 from settings import COLORS, SETTINGS
+import utils
+
+# Vertex label fonts by point size; labels are half the vertex radius, clamped to 8-16 pt
+_LABEL_FONTS = {size: ("Arial", size, "bold") for size in range(8, 17)}
+
+# Vertex outline colour and width by kind: plain, selected, periphery
+_OUTLINE_STYLES = ((COLORS['vertex_colors'][1], 2),
+                   (COLORS['selected_vertex'], 3),
+                   (COLORS['periphery_highlight'], 3))
+
+def _pixels(values: np.ndarray) -> list:
+    """Round canvas coordinates to whole pixels; Tk converts ints faster than floats"""
+    return np.rint(values).astype(np.int64).tolist()
 
 class GraphCanvas(tk.Canvas):
     """Custom canvas for graph visualization with mouse interactions"""
@@ -31,6 +42,32 @@ class GraphCanvas(tk.Canvas):
         self.view_mode = 'color'  # 'color' or 'index'
         self.hidden_threshold = None
         
+        # Canvas size, tracked from <Configure> events instead of asking Tk on
+        # every redraw; the requested size stands in until the canvas is laid out
+        self._width = self.winfo_reqwidth()
+        self._height = self.winfo_reqheight()
+        
+        # Canvas items of the current drawing, reused while only positions change.
+        # Edge walks and vertex rows index the graph's coordinate arrays
+        self._edge_items: List[int] = []
+        self._edge_walks: List[np.ndarray] = []
+        self._vertex_items: List[int] = []
+        self._label_items: List[int] = []
+        self._label_font_sizes = np.empty(0, dtype=np.int64)
+        self._vertex_rows = np.empty(0, dtype=np.int64)
+        self._vertex_onscreen = np.empty(0, dtype=bool)
+        self._style_key = None
+        self._drawn_topology = -1  # Graph topology the items were created for
+        self._drawn_ids = np.empty(0, dtype=np.int64)
+        self._drawn_last_vertex = None
+        self._drawn_edge_count = 0
+        self._drawn_periphery: Set[int] = set()
+        self._drawn_threshold = None
+        self._drawn_version = -1  # Graph version and view transform the items show
+        self._drawn_view = (1.0, 0.0, 0.0)
+        self._placed_zoom = 1.0  # Zoom at which item coordinates were last computed exactly
+        self._redraw_pending = False
+        
         # Mouse interaction state
         self.last_click_pos = None
         self.is_panning = False
@@ -44,6 +81,7 @@ class GraphCanvas(tk.Canvas):
         self.bind("<MouseWheel>", self.on_scroll)
         self.bind("<Button-4>", self.on_scroll)  # Linux scroll up
         self.bind("<Button-5>", self.on_scroll)  # Linux scroll down
+        self.bind("<Configure>", self.on_configure)
         
         # Make canvas focusable for keyboard events
         self.focus_set()
@@ -54,103 +92,332 @@ class GraphCanvas(tk.Canvas):
         self.center_graph()  # Center and scale properly after creation
         self.update_display()
     
+    def view_transform(self) -> Tuple[float, float, float]:
+        """Zoom and canvas position of the graph origin, so x * zoom + ox maps a graph x to the canvas"""
+        return (self.zoom_level,
+                self.pan_offset[0] + self._width / 2,
+                self.pan_offset[1] + self._height / 2)
+    
     def transform_coords(self, x: float, y: float) -> Tuple[float, float]:
         """Transform graph coordinates to canvas coordinates"""
-        # Apply zoom
-        tx = x * self.zoom_level
-        ty = y * self.zoom_level
-        
-        # Apply pan offset
-        tx += self.pan_offset[0]
-        ty += self.pan_offset[1]
-        
-        # Center in canvas
-        tx += self.winfo_width() / 2
-        ty += self.winfo_height() / 2
-        
-        return tx, ty
+        zoom, ox, oy = self.view_transform()
+        return x * zoom + ox, y * zoom + oy
     
     def inverse_transform_coords(self, canvas_x: float, canvas_y: float) -> Tuple[float, float]:
         """Transform canvas coordinates to graph coordinates"""
-        # Reverse centering
-        x = canvas_x - self.winfo_width() / 2
-        y = canvas_y - self.winfo_height() / 2
-        
-        # Reverse pan offset
-        x -= self.pan_offset[0]
-        y -= self.pan_offset[1]
-        
-        # Reverse zoom
-        x /= self.zoom_level
-        y /= self.zoom_level
-        
-        return x, y
+        zoom, ox, oy = self.view_transform()
+        return (canvas_x - ox) / zoom, (canvas_y - oy) / zoom
     
     def update_display(self):
         """Update the canvas display"""
+        # Items are rebuilt only when how they are styled changes or the graph
+        # changed in a way other than gaining vertices; new vertices just get new
+        # items, layout moves reposition the existing ones, and pure pan/zoom
+        # changes shift them all with a single move() or scale()
+        style_key = (self.view_mode, tuple(self.selected_vertices))
+        if style_key != self._style_key or (self.graph.topology_version != self._drawn_topology
+                                            and not self._add_new_items()):
+            self._create_items()
+            self._style_key = style_key
+        elif (self.graph.version != self._drawn_version
+              or not 0.5 <= self.zoom_level / self._placed_zoom <= 2):
+            # Scaling also magnifies the half-pixel rounding of the items, so
+            # they are placed afresh once the zoom has drifted far enough
+            self._restyle_periphery()
+            self._refresh_positions()
+        else:
+            self._transform_items()
+        if self.hidden_threshold != self._drawn_threshold:
+            # Vertices beyond the threshold were hidden like off-canvas ones
+            # above; only the edge polylines need redrawing without them
+            self._create_edge_items()
+        self._drawn_version = self.graph.version
+        self._drawn_view = self.view_transform()
+        if self.graph.topology_version != self._drawn_topology:
+            self._drawn_topology = self.graph.topology_version
+            self._drawn_ids = self._vertex_ids()
+            self._drawn_last_vertex = next(reversed(self.graph.vertices.values()), None)
+            self._drawn_edge_count = len(self.graph.edges)
+    
+    def _schedule_redraw(self):
+        """Redraw once the event queue drains, folding bursts of motion/scroll events into one redraw"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._do_redraw)
+    
+    def _do_redraw(self):
+        """Run the redraw requested by _schedule_redraw"""
+        self._redraw_pending = False
+        self.update_display()
+    
+    def _canvas_positions(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Canvas x, y and radius of every vertex, in the graph's coordinate-array row order"""
+        zoom, ox, oy = self.view_transform()
+        xs, ys, _, _ = self.graph.edge_arrays()
+        return xs * zoom + ox, ys * zoom + oy, self._vertex_diameters() / 2 * zoom
+    
+    def _vertex_diameters(self) -> np.ndarray:
+        """Vertex diameters in the graph's coordinate-array row order"""
+        return self.graph.cached('vertex_diameters', lambda: np.fromiter(
+            (v.diameter for v in self.graph.vertices.values()), dtype=np.float64,
+            count=len(self.graph.vertices)))
+    
+    def _vertex_ids(self) -> np.ndarray:
+        """Vertex ids in the graph's coordinate-array row order"""
+        return self.graph.cached('vertex_ids', lambda: np.fromiter(
+            self.graph.vertices, dtype=np.int64, count=len(self.graph.vertices)))
+    
+    def _create_items(self):
+        """Delete every canvas item and draw the visible graph from scratch"""
         self.delete("all")
-        
-        # Draw edges first (so they appear behind vertices)
-        for edge in self.graph.edges:
-            v1 = self.graph.vertices[edge.v1_id]
-            v2 = self.graph.vertices[edge.v2_id]
-            
-            # Check if vertices should be hidden
-            if self.hidden_threshold is not None:
-                if v1.id > self.hidden_threshold or v2.id > self.hidden_threshold:
-                    continue
-            
-            x1, y1 = self.transform_coords(v1.x, v1.y)
-            x2, y2 = self.transform_coords(v2.x, v2.y)
-            
-            self.create_line(x1, y1, x2, y2, 
-                           fill=COLORS['edge_color'], 
-                           width=2, 
-                           tags="edge")
-        
-        # Draw vertices
-        for vertex_id, vertex in self.graph.vertices.items():
-            # Check if vertex should be hidden
-            if self.hidden_threshold is not None and vertex_id > self.hidden_threshold:
-                continue
-            
-            x, y = self.transform_coords(vertex.x, vertex.y)
-            radius = vertex.diameter / 2 * self.zoom_level
+        self._edge_items = []
+        self._edge_walks = []
+        self._vertex_items = []
+        self._label_items = []
+        self._label_font_sizes = np.empty(0, dtype=np.int64)
+        self._vertex_rows = np.empty(0, dtype=np.int64)
+        self._vertex_onscreen = np.empty(0, dtype=bool)
+        self._drawn_periphery = set(self.graph.periphery)
+        self._drawn_threshold = self.hidden_threshold
+        
+        _, _, e_v1, e_v2 = self.graph.edge_arrays()
+        self._placed_zoom = self.zoom_level
+        self._draw_items(np.arange(len(self.graph.vertices)), e_v1, e_v2, *self._canvas_positions())
+    
+    def _create_edge_items(self):
+        """Replace the edge items, drawing only edges between vertices within the hiding threshold"""
+        self.delete("edge")
+        self._edge_items = []
+        self._edge_walks = []
+        self._drawn_threshold = self.hidden_threshold
+        
+        _, _, e_v1, e_v2 = self.graph.edge_arrays()
+        txs, tys, _ = self._canvas_positions()
+        self._draw_edges(e_v1, e_v2, txs, tys)
+    
+    def _add_new_items(self) -> bool:
+        """
+        Create items for the vertices appended since the items were drawn and for
+        their edges, keeping every existing item. Returns False, drawing nothing,
+        when the graph changed in any other way (vertices removed, edges added
+        between drawn vertices, graph cleared or reloaded)
+        """
+        drawn = len(self._drawn_ids)
+        vertex_ids = self._vertex_ids()
+        if len(vertex_ids) < drawn or not np.array_equal(vertex_ids[:drawn], self._drawn_ids):
+            return False
+        if drawn and self.graph.vertices[int(vertex_ids[drawn - 1])] is not self._drawn_last_vertex:
+            return False
+        
+        # Rows are in insertion order, so the drawn vertices keep their rows and
+        # the new edges are those reaching past them
+        _, _, e_v1, e_v2 = self.graph.edge_arrays()
+        new_edges = np.maximum(e_v1, e_v2) >= drawn
+        if len(e_v1) - np.count_nonzero(new_edges) != self._drawn_edge_count:
+            return False
+        
+        self._draw_items(np.arange(drawn, len(vertex_ids)), e_v1[new_edges], e_v2[new_edges],
+                         *self._canvas_positions())
+        return True
+    
+    def _draw_items(self, rows: np.ndarray, e_v1: np.ndarray, e_v2: np.ndarray,
+                    txs: np.ndarray, tys: np.ndarray, radii: np.ndarray):
+        """Create items for the given vertex rows and edges (as row pairs)"""
+        self._draw_edges(e_v1, e_v2, txs, tys)
+        
+        # Draw vertices; those off the canvas or hidden start in the hidden state
+        vertices = list(self.graph.vertices.values())
+        vertex_onscreen = self._onscreen_vertices(rows, txs, tys, radii)
+        x, y, radii = txs[rows], tys[rows], radii[rows]
+        font_sizes = np.clip((radii / 2).astype(np.int64), 8, 16)
+        boxes = _pixels(np.column_stack((x - radii, y - radii, x + radii, y + radii)))
+        centres = _pixels(np.column_stack((x, y)))
+        outline_styles = map(_OUTLINE_STYLES.__getitem__,
+                             self._outline_kinds(self._vertex_ids()[rows]).tolist())
+        vertex_coords = zip(rows.tolist(), boxes, centres, font_sizes.tolist(),
+                            vertex_onscreen.tolist(), outline_styles)
+        self._vertex_rows = np.concatenate((self._vertex_rows, rows))
+        self._vertex_onscreen = np.concatenate((self._vertex_onscreen, vertex_onscreen))
+        self._label_font_sizes = np.concatenate((self._label_font_sizes, font_sizes))
+        
+        # Styles looked up once for the whole loop
+        vertex_colors = COLORS['vertex_colors']
+        default_color = vertex_colors[1]
+        color_mode = self.view_mode == 'color'
+        
+        for row, box, centre, font_size, onscreen, (outline_color, outline_width) in vertex_coords:
+            vertex = vertices[row]
+            state = 'normal' if onscreen else 'hidden'
+            vertex_id = vertex.id
             
             # Get vertex color based on view mode
-            if self.view_mode == 'color':
-                fill_color = COLORS['vertex_colors'].get(vertex.color_index, COLORS['vertex_colors'][1])
+            if color_mode:
+                fill_color = vertex_colors.get(vertex.color_index, default_color)
             else:
-                fill_color = COLORS['vertex_colors'][1]
-            
-            # Highlight selected vertices
-            outline_color = COLORS['vertex_colors'][1]
-            outline_width = 2
-            if vertex_id in self.selected_vertices:
-                outline_color = COLORS['selected_vertex']
-                outline_width = 3
-            
-            # Highlight periphery vertices
-            if vertex_id in self.graph.periphery:
-                outline_color = COLORS['periphery_highlight']
-                outline_width = 3
+                fill_color = default_color
             
             # Draw vertex circle
-            self.create_oval(x - radius, y - radius, x + radius, y + radius,
-                           fill=fill_color, 
-                           outline=outline_color,
-                           width=outline_width,
-                           tags=f"vertex_{vertex_id}")
+            self._vertex_items.append(self.create_oval(
+                *box,
+                fill=fill_color, 
+                outline=outline_color,
+                width=outline_width,
+                state=state,
+                tags=f"vertex_{vertex_id}"))
             
             # Draw vertex label
-            label_text = str(vertex_id) if self.view_mode == 'index' else str(vertex.color_index)
-            font_size = max(8, min(16, int(radius / 2)))
+            label_text = str(vertex.color_index) if color_mode else vertex.label
             
-            self.create_text(x, y, 
-                           text=label_text, 
-                           font=("Arial", font_size, "bold"),
-                           fill="black",
-                           tags=f"label_{vertex_id}")
+            self._label_items.append(self.create_text(
+                *centre, 
+                text=label_text, 
+                font=_LABEL_FONTS[font_size],
+                fill="black",
+                state=state,
+                tags=f"label_{vertex_id}"))
+    
+    def _draw_edges(self, e_v1: np.ndarray, e_v2: np.ndarray, txs: np.ndarray, tys: np.ndarray):
+        """Create polyline items for the given edges (as row pairs), leaving out those touching hidden vertices"""
+        if self.hidden_threshold is not None:
+            visible = self._vertex_ids() <= self.hidden_threshold
+            keep = visible[e_v1] & visible[e_v2]
+            e_v1, e_v2 = e_v1[keep], e_v2[keep]
+        
+        # Edges all share one style, so each connected component is a single
+        # polyline item; they sit behind every vertex
+        walks = self._walk_edges(e_v1, e_v2)
+        for walk in walks:
+            self._edge_items.append(self.create_line(
+                _pixels(np.column_stack((txs[walk], tys[walk])).ravel()),
+                fill=COLORS['edge_color'], 
+                width=2, 
+                tags="edge"))
+        self._edge_walks.extend(walks)
+        if walks and self._vertex_items:
+            self.tag_lower("edge")
+    
+    def _outline_kinds(self, vertex_ids: np.ndarray) -> np.ndarray:
+        """Index into _OUTLINE_STYLES per vertex; the periphery highlight wins over selection"""
+        is_selected = np.isin(vertex_ids, self.selected_vertices)
+        is_periphery = np.isin(vertex_ids, self.graph.periphery)
+        return np.where(is_periphery, 2, is_selected.astype(np.int64))
+    
+    def _restyle_periphery(self):
+        """Update the outlines of drawn vertices that joined or left the periphery"""
+        periphery = set(self.graph.periphery)
+        changed = np.fromiter(periphery ^ self._drawn_periphery, dtype=np.int64)
+        for vertex_id, kind in zip(changed.tolist(), self._outline_kinds(changed).tolist()):
+            outline_color, outline_width = _OUTLINE_STYLES[kind]
+            self.itemconfigure(f"vertex_{vertex_id}", outline=outline_color, width=outline_width)
+        self._drawn_periphery = periphery
+    
+    @staticmethod
+    def _walk_edges(e_v1: np.ndarray, e_v2: np.ndarray) -> List[np.ndarray]:
+        """
+        Cover the edges (given as row pairs) with one walk of rows per connected
+        component: depth-first over unused edges, stepping back along the way it
+        came when stuck, so consecutive rows are always joined by an edge
+        """
+        neighbors: Dict[int, List[Tuple[int, int]]] = {}
+        for index, (a, b) in enumerate(zip(e_v1.tolist(), e_v2.tolist())):
+            neighbors.setdefault(a, []).append((b, index))
+            neighbors.setdefault(b, []).append((a, index))
+        
+        used = [False] * len(e_v1)
+        next_edge = dict.fromkeys(neighbors, 0)  # Edges before this position are used
+        walks = []
+        for start in neighbors:
+            walk = [start]
+            stack = [start]
+            walk_end = 1  # Length up to the last new edge; later steps only backtrack
+            while stack:
+                row = stack[-1]
+                options = neighbors[row]
+                i = next_edge[row]
+                while i < len(options) and used[options[i][1]]:
+                    i += 1
+                next_edge[row] = i
+                if i < len(options):
+                    other, index = options[i]
+                    used[index] = True
+                    stack.append(other)
+                    walk.append(other)
+                    walk_end = len(walk)
+                else:
+                    stack.pop()
+                    if stack:
+                        walk.append(stack[-1])
+            if walk_end > 1:
+                walks.append(np.array(walk[:walk_end], dtype=np.int64))
+        return walks
+    
+    def _onscreen_vertices(self, rows: np.ndarray, txs: np.ndarray, tys: np.ndarray,
+                           radii: np.ndarray) -> np.ndarray:
+        """Which of the vertices at the given rows are shown: overlapping the canvas and not hidden"""
+        width, height = self._width, self._height
+        x, y, r = txs[rows], tys[rows], radii[rows]
+        shown = (x + r >= 0) & (x - r <= width) & (y + r >= 0) & (y - r <= height)
+        if self.hidden_threshold is not None:
+            shown &= self._vertex_ids()[rows] <= self.hidden_threshold
+        return shown
+    
+    def _refresh_positions(self):
+        """Move the existing canvas items to the current vertex positions and view"""
+        txs, tys, radii = self._canvas_positions()
+        self._placed_zoom = self.zoom_level
+        
+        for item, walk in zip(self._edge_items, self._edge_walks):
+            self.coords(item, _pixels(np.column_stack((txs[walk], tys[walk])).ravel()))
+        
+        self._update_vertex_items(txs, tys, radii, moved=False)
+    
+    def _transform_items(self):
+        """Follow a pan/zoom change by shifting or scaling every item in one call"""
+        zoom, ox, oy = self.view_transform()
+        drawn_zoom, drawn_ox, drawn_oy = self._drawn_view
+        if zoom == drawn_zoom:
+            if ox != drawn_ox or oy != drawn_oy:
+                self.move("all", ox - drawn_ox, oy - drawn_oy)
+        else:
+            # Canvas points map as x' = (x - drawn_ox) * factor + ox, which is a
+            # scale by factor about the point that this leaves fixed
+            factor = zoom / drawn_zoom
+            self.scale("all", (ox - drawn_ox * factor) / (1 - factor),
+                       (oy - drawn_oy * factor) / (1 - factor), factor, factor)
+        
+        self._update_vertex_items(*self._canvas_positions(), moved=True)
+    
+    def _update_vertex_items(self, txs: np.ndarray, tys: np.ndarray, radii: np.ndarray, moved: bool):
+        """
+        Show or hide vertices that crossed the canvas border, and position and
+        size the labels of on-screen ones. With moved set, items already on
+        screen were shifted by move()/scale() and only newly shown ones need
+        coordinates; hidden items are not kept up to date
+        """
+        vertex_onscreen = self._onscreen_vertices(self._vertex_rows, txs, tys, radii)
+        for i in np.flatnonzero(vertex_onscreen != self._vertex_onscreen).tolist():
+            state = 'normal' if vertex_onscreen[i] else 'hidden'
+            self.itemconfigure(self._vertex_items[i], state=state)
+            self.itemconfigure(self._label_items[i], state=state)
+        
+        shown = vertex_onscreen & ~self._vertex_onscreen if moved else vertex_onscreen
+        self._vertex_onscreen = vertex_onscreen
+        
+        shown = np.flatnonzero(shown)
+        rows = self._vertex_rows[shown]
+        x, y, radii_shown = txs[rows], tys[rows], radii[rows]
+        boxes = _pixels(np.column_stack((x - radii_shown, y - radii_shown, x + radii_shown, y + radii_shown)))
+        centres = _pixels(np.column_stack((x, y)))
+        for i, box, centre in zip(shown.tolist(), boxes, centres):
+            self.coords(self._vertex_items[i], *box)
+            self.coords(self._label_items[i], *centre)
+        
+        # Labels only need reconfiguring when zooming changes their font size
+        font_sizes = np.clip((radii[self._vertex_rows] / 2).astype(np.int64), 8, 16)
+        resized = np.flatnonzero(vertex_onscreen & (font_sizes != self._label_font_sizes))
+        for i in resized.tolist():
+            self.itemconfigure(self._label_items[i], font=_LABEL_FONTS[int(font_sizes[i])])
+            self._label_font_sizes[i] = font_sizes[i]
     
     def on_left_click(self, event):
         """Handle left mouse click"""
@@ -161,7 +428,7 @@ class GraphCanvas(tk.Canvas):
         
         if self.manual_add_mode and clicked_vertex is not None:
             # Manual vertex addition mode
-            if clicked_vertex in self.graph.periphery:
+            if self.graph.contains_periphery(clicked_vertex):
                 if len(self.selected_vertices) < 2:
                     if clicked_vertex not in self.selected_vertices:
                         self.selected_vertices.append(clicked_vertex)
@@ -171,7 +438,6 @@ class GraphCanvas(tk.Canvas):
                             v1, v2 = self.selected_vertices
                             try:
                                 self.command_processor.add_manual_vertex(v1, v2)
-                                self.update_display()
                                 self.parent.update_status(f"Added vertex between {v1} and {v2}")
                             except Exception as e:
                                 messagebox.showerror("Error", f"Error adding vertex: {e}")
@@ -180,6 +446,7 @@ class GraphCanvas(tk.Canvas):
                                 self.selected_vertices = []
                                 self.parent.update_manual_mode_status()
                         
+                        # One redraw per click, after the selection is settled
                         self.update_display()
                 else:
                     messagebox.showwarning("Warning", "Click on a periphery vertex")
@@ -198,7 +465,11 @@ class GraphCanvas(tk.Canvas):
             self.pan_offset[1] += dy
             
             self.last_click_pos = (event.x, event.y)
-            self.update_display()
+            self._schedule_redraw()
+    
+    def on_configure(self, event):
+        """Track the canvas size"""
+        self._width, self._height = event.width, event.height
     
     def on_release(self, event):
         """Handle mouse button release"""
@@ -221,8 +492,8 @@ class GraphCanvas(tk.Canvas):
         
         # Adjust pan offset to zoom towards mouse position
         mouse_x, mouse_y = event.x, event.y
-        canvas_center_x = self.winfo_width() / 2
-        canvas_center_y = self.winfo_height() / 2
+        canvas_center_x = self._width / 2
+        canvas_center_y = self._height / 2
         
         # Calculate offset from center
         offset_x = mouse_x - canvas_center_x
@@ -233,7 +504,7 @@ class GraphCanvas(tk.Canvas):
         self.pan_offset[0] -= offset_x * zoom_change
         self.pan_offset[1] -= offset_y * zoom_change
         
-        self.update_display()
+        self._schedule_redraw()
     
     def on_key_press(self, event):
         """Handle keyboard shortcuts"""
@@ -267,18 +538,34 @@ class GraphCanvas(tk.Canvas):
     
     def get_vertex_at_position(self, canvas_x: float, canvas_y: float) -> Optional[int]:
         """Get vertex at canvas position"""
-        for vertex_id, vertex in self.graph.vertices.items():
-            if self.hidden_threshold is not None and vertex_id > self.hidden_threshold:
-                continue
-            
-            vx, vy = self.transform_coords(vertex.x, vertex.y)
-            radius = vertex.diameter / 2 * self.zoom_level
-            
-            distance = math.sqrt((canvas_x - vx)**2 + (canvas_y - vy)**2)
-            if distance <= radius:
-                return vertex_id
-        
-        return None
+        if not self.graph.vertices:
+            return None
+        
+        # Test only the vertices in the grid cells around the point, in graph
+        # coordinates; cells are as wide as the largest vertex, so any circle
+        # containing the point has its centre in the surrounding 3x3 cells
+        gx, gy = self.inverse_transform_coords(canvas_x, canvas_y)
+        xs, ys, _, _ = self.graph.edge_arrays()
+        diameters = self._vertex_diameters()
+        vertex_ids = self._vertex_ids()
+        cell_size = float(diameters.max())
+        grid = self.graph.spatial_grid(cell_size)
+        cell_x, cell_y = int(gx // cell_size), int(gy // cell_size)
+        
+        # First vertex in insertion order (lowest row) whose circle contains the point
+        hit_row = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for row in grid.get((cell_x + dx, cell_y + dy), ()):
+                    if hit_row is not None and row > hit_row:
+                        continue
+                    if self.hidden_threshold is not None and vertex_ids[row] > self.hidden_threshold:
+                        continue
+                    radius = diameters[row] / 2
+                    if (gx - xs[row]) ** 2 + (gy - ys[row]) ** 2 <= radius * radius:
+                        hit_row = row
+        
+        return None if hit_row is None else int(vertex_ids[hit_row])
     
     def center_graph(self):
         """Center and fit graph to canvas"""
@@ -287,8 +574,8 @@ class GraphCanvas(tk.Canvas):
                 return
             
             # Get canvas dimensions
-            canvas_width = self.winfo_width() or 1480
-            canvas_height = self.winfo_height() or 820
+            canvas_width = self._width or 1480
+            canvas_height = self._height or 820
             
             # Calculate current graph bounds
             min_x = min(v.x for v in self.graph.vertices.values())
@@ -353,6 +640,7 @@ class GraphCanvas(tk.Canvas):
     
     def export_graph(self):
         """Export graph to JSON"""
+        from tkinter import filedialog  # Only needed once a file is picked
         filename = filedialog.asksaveasfilename(
             defaultextension=".json",
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
@@ -360,21 +648,22 @@ class GraphCanvas(tk.Canvas):
         if filename:
             try:
                 graph_data = self.graph.to_dict()
-                with open(filename, 'w') as f:
-                    json.dump(graph_data, f, indent=2)
+                with open(filename, 'wb') as f:
+                    f.write(utils.dumps_json(graph_data, indent=True))
                 self.parent.update_status(f"Graph exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export: {e}")
     
     def import_graph(self):
         """Import graph from JSON"""
+        from tkinter import filedialog
         filename = filedialog.askopenfilename(
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
         )
         if filename:
             try:
-                with open(filename, 'r') as f:
-                    graph_data = json.load(f)
+                with open(filename, 'rb') as f:
+                    graph_data = utils.loads_json(f.read())
                 self.graph.from_dict(graph_data)
                 self.update_display()
                 self.parent.update_status(f"Graph imported from {filename}")
@@ -418,6 +707,7 @@ class MainWindow:
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
         # Bind window events
+        self._resize_after_id = None
         self.root.bind("<Configure>", self.on_window_resize)
         
         # Make canvas focusable
@@ -573,9 +863,17 @@ class MainWindow:
     
     def on_window_resize(self, event):
         """Handle window resize"""
-        if event.widget == self.root:
-            # Update canvas size and redraw
-            self.canvas.update_display()
+        if event.widget is self.root:
+            # Redraw once the window has stopped changing size for 50 ms, rather
+            # than for every <Configure> event of an interactive resize
+            if self._resize_after_id is not None:
+                self.root.after_cancel(self._resize_after_id)
+            self._resize_after_id = self.root.after(50, self._redraw_after_resize)
+    
+    def _redraw_after_resize(self):
+        """Redraw the canvas at its new size"""
+        self._resize_after_id = None
+        self.canvas.update_display()
     
     def run(self):
         """Run the application"""
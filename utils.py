@@ -2,17 +2,53 @@
 Utility functions for the planar graph visualizer
 """
 
+import contextlib
+import copy
+import functools
 import math
 import numpy as np
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Union
 import json
 import time
 
+try:
+    import orjson
+except ImportError:  # Environments set up without the lock file still work via stdlib json
+    orjson = None
+
+# Point sets are taken either as (x, y) tuples or, for bulk work, as one
+# contiguous (N, 2) float array that NumPy can reduce column by column
+PointsLike = Union[List[Tuple[float, float]], np.ndarray]
+
+def as_point_array(points: PointsLike) -> np.ndarray:
+    """
+    View or copy points as a C-contiguous (N, 2) float64 array
+    """
+    return np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+
 def calculate_distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
     """
     Calculate Euclidean distance between two points
     """
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+def calculate_distances(xy1: np.ndarray, xy2: np.ndarray) -> np.ndarray:
+    """
+    Calculate Euclidean distances between matching rows of two (N, 2) arrays
+    """
+    xy1 = np.asarray(xy1, dtype=np.float64)
+    xy2 = np.asarray(xy2, dtype=np.float64)
+    return np.hypot(xy1[..., 0] - xy2[..., 0], xy1[..., 1] - xy2[..., 1])
+
+def pairwise_distances(points: PointsLike) -> np.ndarray:
+    """
+    Calculate the (N, N) matrix of Euclidean distances between all pairs of
+    points by broadcasting; it takes N * N floats of memory
+    """
+    pts = as_point_array(points)
+    dx = pts[:, 0, None] - pts[:, 0]
+    dy = pts[:, 1, None] - pts[:, 1]
+    return np.sqrt(dx * dx + dy * dy)
 
 def calculate_angle(p1: Tuple[float, float], center: Tuple[float, float], 
                    p2: Tuple[float, float]) -> float:
@@ -55,42 +91,71 @@ def rotate_point(point: Tuple[float, float], center: Tuple[float, float],
     # Translate back
     return (new_x + center[0], new_y + center[1])
 
+def rotate_points(points: PointsLike, center: Tuple[float, float], angle: float) -> np.ndarray:
+    """
+    Rotate many points around a common center by the given angle (in radians),
+    returning an (N, 2) array
+    """
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    rotation = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+    
+    offset = np.asarray(center, dtype=np.float64)
+    return (as_point_array(points) - offset) @ rotation.T + offset
+
 def normalize_angle(angle: float) -> float:
     """
     Normalize angle to [0, 2π] range
     """
-    while angle < 0:
-        angle += 2 * math.pi
-    while angle >= 2 * math.pi:
-        angle -= 2 * math.pi
-    return angle
+    angle %= math.tau
+    # A tiny negative angle rounds up to exactly 2π
+    return angle if angle < math.tau else 0.0
+
+def normalize_angles(angles: np.ndarray) -> np.ndarray:
+    """
+    Normalize an array of angles to [0, 2π] range
+    """
+    angles = np.mod(angles, math.tau)
+    return np.where(angles < math.tau, angles, 0.0)
 
 def point_to_line_distance(point: Tuple[float, float], line_start: Tuple[float, float], 
                           line_end: Tuple[float, float]) -> float:
     """
     Calculate the shortest distance from a point to a line segment
     """
+    return math.sqrt(point_to_segment_distance_sq(point, line_start, line_end))
+
+def point_to_segment_distance_sq(point: Tuple[float, float], line_start: Tuple[float, float],
+                                 line_end: Tuple[float, float]) -> float:
+    """
+    Calculate the squared shortest distance from a point to a line segment.
+    To test whether a point is within r of a segment, compare this with r * r
+    and skip the square root
+    """
     x0, y0 = point
     x1, y1 = line_start
     x2, y2 = line_end
     
-    # Calculate line length
-    line_length = calculate_distance(line_start, line_end)
+    # Calculate squared line length
+    dx = x2 - x1
+    dy = y2 - y1
+    length_sq = dx * dx + dy * dy
     
-    if line_length == 0:
-        return calculate_distance(point, line_start)
+    if length_sq == 0:
+        ex = x0 - x1
+        ey = y0 - y1
+        return ex * ex + ey * ey
     
     # Calculate parameter t for the closest point on the line
-    t = ((x0 - x1) * (x2 - x1) + (y0 - y1) * (y2 - y1)) / (line_length ** 2)
+    t = ((x0 - x1) * dx + (y0 - y1) * dy) / length_sq
     
     # Clamp t to [0, 1] to stay within the line segment
     t = max(0, min(1, t))
     
-    # Find the closest point on the line segment
-    closest_x = x1 + t * (x2 - x1)
-    closest_y = y1 + t * (y2 - y1)
-    
-    return calculate_distance(point, (closest_x, closest_y))
+    # Offset from the closest point on the line segment
+    ex = x0 - (x1 + t * dx)
+    ey = y0 - (y1 + t * dy)
+    return ex * ex + ey * ey
 
 def lines_intersect(line1_start: Tuple[float, float], line1_end: Tuple[float, float],
                    line2_start: Tuple[float, float], line2_end: Tuple[float, float]) -> bool:
@@ -115,33 +180,93 @@ def lines_intersect(line1_start: Tuple[float, float], line1_end: Tuple[float, fl
     # Check if intersection occurs within both line segments
     return 0 <= t <= 1 and 0 <= u <= 1
 
-def convex_hull(points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+def segments_intersect(line1_start: np.ndarray, line1_end: np.ndarray,
+                       line2_start: np.ndarray, line2_end: np.ndarray) -> np.ndarray:
+    """
+    Check many pairs of line segments for intersection at once, by the same
+    test as lines_intersect. The arguments are (..., 2) arrays of endpoints that
+    broadcast against each other, so all pairs between two sets of N and M
+    segments are tested by passing line1_start[:, None], line1_end[:, None],
+    line2_start[None, :] and line2_end[None, :], giving an (N, M) mask
+    """
+    x1, y1 = np.moveaxis(np.asarray(line1_start, dtype=np.float64), -1, 0)
+    x2, y2 = np.moveaxis(np.asarray(line1_end, dtype=np.float64), -1, 0)
+    x3, y3 = np.moveaxis(np.asarray(line2_start, dtype=np.float64), -1, 0)
+    x4, y4 = np.moveaxis(np.asarray(line2_end, dtype=np.float64), -1, 0)
+    
+    denom = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    not_parallel = np.abs(denom) >= 1e-10
+    denom = np.where(not_parallel, denom, 1.0)  # Parallel pairs are masked out below
+    
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denom
+    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denom
+    
+    return not_parallel & (0 <= t) & (t <= 1) & (0 <= u) & (u <= 1)
+
+def _cross2(ox, oy, ax, ay, bx, by):
+    """
+    Cross product of (a - o) and (b - o): positive when o, a, b turn
+    counter-clockwise, zero when collinear. Works on scalars and arrays alike
+    """
+    return (ax - ox) * (by - oy) - (ay - oy) * (bx - ox)
+
+def _inside_extreme_octagon(pts: np.ndarray) -> np.ndarray:
+    """
+    Mask of the points strictly inside the octagon spanned by the extremes of
+    x, y, x + y and x - y (Akl-Toussaint); those are inside the hull as well
+    """
+    x, y = pts[:, 0], pts[:, 1]
+    s, d = x + y, x - y
+    # Extremes in counter-clockwise order, starting from the leftmost point
+    corners = [x.argmin(), s.argmin(), y.argmin(), d.argmax(),
+               x.argmax(), s.argmax(), y.argmax(), d.argmin()]
+    corners = [c for i, c in enumerate(corners) if c != corners[i - 1]]
+    if len(corners) < 3:
+        return np.zeros(len(pts), dtype=bool)
+    
+    inside = np.ones(len(pts), dtype=bool)
+    octagon = pts[corners]
+    for (ax, ay), (bx, by) in zip(octagon, np.roll(octagon, -1, axis=0)):
+        inside &= _cross2(ax, ay, bx, by, x, y) > 0
+    return inside
+
+def convex_hull(points: PointsLike) -> List[Tuple[float, float]]:
     """
     Calculate the convex hull of a set of points using Graham scan
     """
     if len(points) < 3:
         return points
     
-    def cross_product(o, a, b):
-        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
-    
-    # Sort points lexicographically
-    points = sorted(set(points))
+    # Deduplicate and sort points lexicographically in one NumPy pass, then
+    # drop the points that cannot be on the hull before scanning
+    pts = np.unique(as_point_array(points), axis=0)
+    if len(pts) > 16:
+        pts = pts[~_inside_extreme_octagon(pts)]
+    points = list(map(tuple, pts.tolist()))
     
     if len(points) <= 1:
         return points
     
-    # Build lower hull
+    # Build lower hull; the turn test is _cross2 written out, as a call per
+    # step would cost more than the arithmetic
     lower = []
     for p in points:
-        while len(lower) >= 2 and cross_product(lower[-2], lower[-1], p) <= 0:
+        px, py = p
+        while len(lower) >= 2:
+            (ox, oy), (ax, ay) = lower[-2], lower[-1]
+            if (ax - ox) * (py - oy) - (ay - oy) * (px - ox) > 0:
+                break
             lower.pop()
         lower.append(p)
     
     # Build upper hull
     upper = []
     for p in reversed(points):
-        while len(upper) >= 2 and cross_product(upper[-2], upper[-1], p) <= 0:
+        px, py = p
+        while len(upper) >= 2:
+            (ox, oy), (ax, ay) = upper[-2], upper[-1]
+            if (ax - ox) * (py - oy) - (ay - oy) * (px - ox) > 0:
+                break
             upper.pop()
         upper.append(p)
     
@@ -170,49 +295,67 @@ def point_in_polygon(point: Tuple[float, float], polygon: List[Tuple[float, floa
     
     return inside
 
-def calculate_polygon_area(points: List[Tuple[float, float]]) -> float:
+def points_in_polygon(points: PointsLike, polygon: List[Tuple[float, float]]) -> np.ndarray:
+    """
+    Check which of many points are inside a polygon: the ray casting of
+    point_in_polygon, looping over the polygon edges but not over the points
+    """
+    pts = as_point_array(points)
+    x, y = pts[:, 0], pts[:, 1]
+    inside = np.zeros(len(pts), dtype=bool)
+    
+    p1x, p1y = polygon[-1]
+    for p2x, p2y in polygon:
+        # Horizontal edges never cross the ray
+        if p1y != p2y:
+            crosses = (y > min(p1y, p2y)) & (y <= max(p1y, p2y)) & (x <= max(p1x, p2x))
+            if p1x != p2x:
+                crosses &= x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+            inside ^= crosses
+        p1x, p1y = p2x, p2y
+    
+    return inside
+
+def calculate_polygon_area(points: PointsLike) -> float:
     """
     Calculate the area of a polygon using the shoelace formula
     """
     if len(points) < 3:
         return 0
     
-    area = 0
-    for i in range(len(points)):
-        j = (i + 1) % len(points)
-        area += points[i][0] * points[j][1]
-        area -= points[j][0] * points[i][1]
+    # Shoelace sum as two dot products of the x and y columns with the
+    # other column shifted to the next vertex
+    pts = as_point_array(points)
+    x, y = pts[:, 0], pts[:, 1]
+    area = np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))
     
-    return abs(area) / 2
+    return abs(float(area)) / 2
 
-def calculate_polygon_centroid(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+def calculate_polygon_centroid(points: PointsLike) -> Tuple[float, float]:
     """
     Calculate the centroid of a polygon
     """
-    if not points:
+    if len(points) == 0:
         return (0, 0)
     
-    if len(points) == 1:
-        return points[0]
-    
-    if len(points) == 2:
-        return ((points[0][0] + points[1][0]) / 2, (points[0][1] + points[1][1]) / 2)
-    
-    area = calculate_polygon_area(points)
+    pts = as_point_array(points)
+    if len(pts) <= 2:
+        # A point or the midpoint of a segment
+        cx, cy = pts.mean(axis=0).tolist()
+        return (cx, cy)
+    
+    # Area and centroid share the per-edge cross products of the shoelace formula
+    x, y = pts[:, 0], pts[:, 1]
+    x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y_next - x_next * y
+    area = float(cross.sum()) / 2  # Signed: positive for counter-clockwise vertices
     if area == 0:
         # Degenerate case - return simple average
-        return (sum(p[0] for p in points) / len(points), 
-                sum(p[1] for p in points) / len(points))
-    
-    cx = cy = 0
-    for i in range(len(points)):
-        j = (i + 1) % len(points)
-        factor = points[i][0] * points[j][1] - points[j][0] * points[i][1]
-        cx += (points[i][0] + points[j][0]) * factor
-        cy += (points[i][1] + points[j][1]) * factor
+        cx, cy = pts.mean(axis=0).tolist()
+        return (cx, cy)
     
-    cx /= (6 * area)
-    cy /= (6 * area)
+    cx = float(np.dot(x + x_next, cross)) / (6 * area)
+    cy = float(np.dot(y + y_next, cross)) / (6 * area)
     
     return (cx, cy)
 
@@ -228,6 +371,19 @@ def clamp(value: float, min_value: float, max_value: float) -> float:
     """
     return max(min_value, min(max_value, value))
 
+def lerp_array(a: np.ndarray, b: np.ndarray, t: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Linear interpolation between arrays of values
+    """
+    a = np.asarray(a, dtype=np.float64)
+    return a + t * (np.asarray(b, dtype=np.float64) - a)
+
+def clamp_array(values: np.ndarray, min_value: float, max_value: float) -> np.ndarray:
+    """
+    Clamp an array of values between min and max
+    """
+    return np.clip(values, min_value, max_value)
+
 def format_number(value: float, precision: int = 2) -> str:
     """
     Format a number with specified precision
@@ -251,28 +407,59 @@ def validate_json(data: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
     Validate JSON string and return parsed data if valid
     """
     try:
-        parsed = json.loads(data)
+        parsed = loads_json(data)
         return True, parsed
     except json.JSONDecodeError as e:
         return False, None
 
+def dumps_json(data: Any, indent: bool = False) -> bytes:
+    """
+    Serialize data to UTF-8 JSON bytes, using orjson when it is installed
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    
+    if indent:
+        return json.dumps(data, indent=2).encode()
+    return json.dumps(data, separators=(",", ":")).encode()
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def deep_copy_dict(original: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create a deep copy of a dictionary
     """
-    return json.loads(json.dumps(original))
+    return copy.deepcopy(original)
 
-def calculate_bounding_box(points: List[Tuple[float, float]]) -> Tuple[float, float, float, float]:
+def deep_copy_json(original: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a deep copy of JSON-compatible data by a serialization round trip,
+    which is the faster copy when orjson is installed. Like any JSON round
+    trip, tuples come back as lists and non-string keys as strings
+    """
+    return loads_json(dumps_json(original))
+
+def calculate_bounding_box(points: PointsLike) -> Tuple[float, float, float, float]:
     """
     Calculate bounding box (min_x, min_y, max_x, max_y) for a list of points
+    or an (N, 2) array
     """
-    if not points:
+    if len(points) == 0:
         return (0, 0, 0, 0)
     
-    min_x = min(p[0] for p in points)
-    max_x = max(p[0] for p in points)
-    min_y = min(p[1] for p in points)
-    max_y = max(p[1] for p in points)
+    # One min and one max reduction over both columns
+    pts = points if isinstance(points, np.ndarray) else as_point_array(points)
+    min_x, min_y = pts.min(axis=0).tolist()
+    max_x, max_y = pts.max(axis=0).tolist()
     
     return (min_x, min_y, max_x, max_y)
 
@@ -290,9 +477,20 @@ def points_are_collinear(p1: Tuple[float, float], p2: Tuple[float, float],
     Check if three points are collinear within a tolerance
     """
     # Calculate the cross product of vectors (p2-p1) and (p3-p1)
-    cross = (p2[0] - p1[0]) * (p3[1] - p1[1]) - (p2[1] - p1[1]) * (p3[0] - p1[0])
+    cross = _cross2(p1[0], p1[1], p2[0], p2[1], p3[0], p3[1])
     return abs(cross) < tolerance
 
+def points_are_collinear_batch(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray,
+                               tolerance: float = 1e-10) -> np.ndarray:
+    """
+    Check many point triples for collinearity at once, given as three (N, 2)
+    arrays; the preferred form for loops such as edge simplification, with
+    points_are_collinear for one-off checks
+    """
+    p1, p2, p3 = as_point_array(p1), as_point_array(p2), as_point_array(p3)
+    cross = _cross2(p1[:, 0], p1[:, 1], p2[:, 0], p2[:, 1], p3[:, 0], p3[:, 1])
+    return np.abs(cross) < tolerance
+
 def generate_random_color() -> str:
     """
     Generate a random hex color
@@ -300,40 +498,87 @@ def generate_random_color() -> str:
     import random
     return f"#{random.randint(0, 0xFFFFFF):06x}"
 
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """
+    Split a #rrggbb color into its channels, parsing it as one 24-bit integer
+    """
+    value = int(hex_color.lstrip('#')[:6], 16)
+    return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
 def color_distance(color1: str, color2: str) -> float:
     """
     Calculate perceptual distance between two hex colors
     """
-    def hex_to_rgb(hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
-    r1, g1, b1 = hex_to_rgb(color1)
-    r2, g2, b2 = hex_to_rgb(color2)
+    return math.sqrt(color_distance_sq(color1, color2))
+
+def color_distance_sq(color1: str, color2: str) -> int:
+    """
+    Calculate the squared distance between two hex colors, which is exact and
+    enough for comparing against a squared threshold
+    """
+    r1, g1, b1 = _hex_to_rgb(color1)
+    r2, g2, b2 = _hex_to_rgb(color2)
     
     # Simple Euclidean distance in RGB space
-    return math.sqrt((r1 - r2)**2 + (g1 - g2)**2 + (b1 - b2)**2)
+    dr, dg, db = r1 - r2, g1 - g2, b1 - b2
+    return dr * dr + dg * dg + db * db
+
+# Call count and total nanoseconds per timed name, filled by timed() and
+# performance_timer and read back with get_stats()
+_timings: Dict[str, List[int]] = {}
+
+def _record_timing(name: str, elapsed_ns: int):
+    """
+    Add one measured call to the totals for name
+    """
+    entry = _timings.setdefault(name, [0, 0])
+    entry[0] += 1
+    entry[1] += elapsed_ns
+
+@contextlib.contextmanager
+def timed(name: str):
+    """
+    Context manager adding the execution time of its block to the totals for name
+    """
+    start_time = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _record_timing(name, time.perf_counter_ns() - start_time)
 
 def performance_timer(func):
     """
-    Decorator to measure function execution time
+    Decorator to measure function execution time; totals are kept under the
+    function's qualified name and read back with get_stats()
     """
+    name = func.__qualname__
+    
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"{func.__name__} executed in {end_time - start_time:.4f} seconds")
-        return result
+        start_time = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record_timing(name, time.perf_counter_ns() - start_time)
     return wrapper
 
+def get_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Get the call count and total and mean execution time (in seconds) of
+    everything measured with timed() or performance_timer
+    """
+    return {name: {"calls": calls, "total": total_ns / 1e9, "mean": total_ns / calls / 1e9}
+            for name, (calls, total_ns) in _timings.items()}
+
 class CircularBuffer:
     """
-    Simple circular buffer for storing recent values
+    Simple circular buffer for storing recent values. Given a dtype, the
+    values are kept in a preallocated NumPy array and read back as arrays
     """
     
-    def __init__(self, size: int):
+    def __init__(self, size: int, dtype: Optional[Any] = None):
         self.size = size
-        self.buffer = [None] * size
+        self.buffer = [None] * size if dtype is None else np.empty(size, dtype=dtype)
         self.index = 0
         self.count = 0
     
@@ -345,12 +590,24 @@ class CircularBuffer:
     def get_all(self):
         if self.count < self.size:
             return self.buffer[:self.count]
+        elif isinstance(self.buffer, np.ndarray):
+            return np.concatenate((self.buffer[self.index:], self.buffer[:self.index]))
         else:
             return self.buffer[self.index:] + self.buffer[:self.index]
     
     def get_last(self, n: int):
         all_items = self.get_all()
         return all_items[-n:] if n <= len(all_items) else all_items
+    
+    # Reductions don't depend on order, so they run over the filled slots in place
+    def sum(self):
+        return np.sum(self.buffer[:self.count])
+    
+    def mean(self):
+        return np.mean(self.buffer[:self.count])
+    
+    def max(self):
+        return np.max(self.buffer[:self.count])
 
 def smooth_values(values: List[float], window_size: int = 3) -> List[float]:
     """
@@ -359,12 +616,12 @@ def smooth_values(values: List[float], window_size: int = 3) -> List[float]:
     if window_size <= 1 or len(values) <= window_size:
         return values[:]
     
-    smoothed = []
     half_window = window_size // 2
     
-    for i in range(len(values)):
-        start = max(0, i - half_window)
-        end = min(len(values), i + half_window + 1)
-        smoothed.append(sum(values[start:end]) / (end - start))
+    # Each window sum is a difference of two prefix sums
+    prefix = np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=np.float64))))
+    index = np.arange(len(values))
+    start = np.maximum(0, index - half_window)
+    end = np.minimum(len(values), index + half_window + 1)
     
-    return smoothed
+    return ((prefix[end] - prefix[start]) / (end - start)).tolist()